@@ -0,0 +1,28 @@
+"""index authsession expiration
+
+Revision ID: 0552f0d2788b
+Revises: 62ad4d3df44f
+Create Date: 2026-10-17 20:31:09.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '0552f0d2788b'
+down_revision: Union[str, None] = '62ad4d3df44f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('authsession', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_authsession_expiration'), ['expiration'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('authsession', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_authsession_expiration'))
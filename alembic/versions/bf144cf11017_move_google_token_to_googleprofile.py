@@ -0,0 +1,60 @@
+"""move google_token to googleprofile
+
+Revision ID: bf144cf11017
+Revises: c2267a990d5a
+Create Date: 2026-10-17 20:52:40.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'bf144cf11017'
+down_revision: Union[str, None] = 'c2267a990d5a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+user = sa.table('user', sa.column('id'), sa.column('google_token'))
+googleprofile = sa.table('googleprofile', sa.column('user_id'), sa.column('profile'))
+
+
+def upgrade() -> None:
+    op.create_table('googleprofile',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('profile', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('googleprofile', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_googleprofile_user_id'), ['user_id'], unique=True)
+
+    op.execute(
+        googleprofile.insert().from_select(
+            ['user_id', 'profile'],
+            sa.select(user.c.id, user.c.google_token).where(user.c.google_token.isnot(None)),
+        )
+    )
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('google_token')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('google_token', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+    op.execute(
+        user.update().values(
+            google_token=sa.select(googleprofile.c.profile)
+            .where(googleprofile.c.user_id == user.c.id)
+            .scalar_subquery()
+        )
+    )
+
+    with op.batch_alter_table('googleprofile', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_googleprofile_user_id'))
+
+    op.drop_table('googleprofile')
@@ -0,0 +1,28 @@
+"""unique index user google_sub
+
+Revision ID: c2267a990d5a
+Revises: 0552f0d2788b
+Create Date: 2026-10-17 20:41:12.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2267a990d5a'
+down_revision: Union[str, None] = '0552f0d2788b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_google_sub'), ['google_sub'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_google_sub'))
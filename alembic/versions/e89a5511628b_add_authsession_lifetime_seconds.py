@@ -0,0 +1,35 @@
+"""add authsession lifetime_seconds
+
+Revision ID: e89a5511628b
+Revises: f7fb1fdc9b03
+Create Date: 2026-10-17 22:08:51.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'e89a5511628b'
+down_revision: Union[str, None] = 'f7fb1fdc9b03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every session created before this column existed used the default 7-day lifetime.
+DEFAULT_LIFETIME_SECONDS = 7 * 24 * 60 * 60
+
+authsession = sa.table('authsession', sa.column('lifetime_seconds'))
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('authsession', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lifetime_seconds', sa.Integer(), nullable=True))
+
+    op.execute(authsession.update().values(lifetime_seconds=DEFAULT_LIFETIME_SECONDS))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('authsession', schema=None) as batch_op:
+        batch_op.drop_column('lifetime_seconds')
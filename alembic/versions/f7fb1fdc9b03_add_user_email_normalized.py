@@ -0,0 +1,70 @@
+"""add user email_normalized
+
+Revision ID: f7fb1fdc9b03
+Revises: bf144cf11017
+Create Date: 2026-10-17 21:34:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7fb1fdc9b03'
+down_revision: Union[str, None] = 'bf144cf11017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+user = sa.table('user', sa.column('id'), sa.column('email'), sa.column('email_normalized'))
+
+
+def normalize_email(email: str) -> str:
+    # Copy of combo_auth.user.normalize_email, kept here so this migration doesn't
+    # change if the app's helper does. SQL lower()/trim() would differ from it
+    # for non-ASCII letters and non-space whitespace.
+    return email.strip().lower()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(user.c.id, user.c.email)).all()
+    normalized = {user_id: normalize_email(email or "") for user_id, email in rows}
+
+    # Check for collisions before changing anything, so a failed run leaves the
+    # table as it was.
+    counts: dict[str, int] = {}
+    for value in normalized.values():
+        counts[value] = counts.get(value, 0) + 1
+    duplicates = sorted(value for value, count in counts.items() if count > 1)
+    if duplicates:
+        raise RuntimeError(
+            "Cannot add a unique index on user.email_normalized; these emails are "
+            f"registered more than once with different case or spacing: {duplicates}. "
+            "Merge or remove the extra accounts and run the migration again."
+        )
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('email_normalized', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+    if normalized:
+        bind.execute(
+            user.update()
+            .where(user.c.id == sa.bindparam('b_id'))
+            .values(email_normalized=sa.bindparam('b_email_normalized')),
+            [
+                {'b_id': user_id, 'b_email_normalized': value}
+                for user_id, value in normalized.items()
+            ],
+        )
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('email_normalized', existing_type=sqlmodel.sql.sqltypes.AutoString(), nullable=False)
+        batch_op.create_index(batch_op.f('ix_user_email_normalized'), ['email_normalized'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_email_normalized'))
+        batch_op.drop_column('email_normalized')
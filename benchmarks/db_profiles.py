@@ -0,0 +1,121 @@
+"""
+Concurrent-login throughput of the auth database under different DbProfiles.
+
+    python -m benchmarks.db_profiles [--workers 32] [--seconds 5]
+    python -m benchmarks.db_profiles --db-url postgresql://localhost/auth_bench
+"""
+import argparse
+import asyncio
+import datetime
+import tempfile
+import time
+import uuid
+
+import sqlmodel
+from sqlalchemy import create_engine, delete
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from combo_auth.auth_db import async_db_url
+from combo_auth.auth_session import AuthSession
+from combo_auth.db_profile import DbProfile
+from combo_auth.user import User, normalize_email
+
+SQLITE_PROFILES = {
+    "untuned (driver defaults)": DbProfile(
+        sqlite_journal_mode=None, sqlite_busy_timeout_ms=None, sqlite_synchronous=None
+    ),
+    "wal, synchronous=normal": DbProfile(),
+    "wal, synchronous=full": DbProfile(sqlite_synchronous="full"),
+}
+POSTGRES_PROFILES = {
+    "pool 5+0, no pre-ping": DbProfile(
+        pool_size=5, max_overflow=0, pool_pre_ping=False, statement_timeout_ms=None
+    ),
+    "pool 5+10 (default)": DbProfile(),
+    "pool 20+10": DbProfile(pool_size=20, max_overflow=10),
+}
+
+
+async def run_profile(
+    url: str, profile: DbProfile, workers: int, seconds: float
+) -> tuple[float, float, int]:
+    sync_engine = create_engine(url)
+    sqlmodel.SQLModel.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    async_url = async_db_url(url)
+    engine = create_async_engine(async_url, **profile.engine_kwargs(async_url))
+    profile.apply(engine.sync_engine)
+    user_ids = []
+    async with AsyncSession(engine) as session:
+        for n in range(workers):
+            email = f"bench-{uuid.uuid4().hex}@example.com"
+            user = User(username=f"bench{n}", email=email, email_normalized=normalize_email(email))
+            session.add(user)
+            user_ids.append(user.id)
+        await session.commit()
+
+    latencies: list[float] = []
+    failures = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(user_id: str):
+        nonlocal failures
+        while time.perf_counter() < deadline:
+            token = uuid.uuid4().hex
+            expiration = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=7)
+            start = time.perf_counter()
+            try:
+                async with AsyncSession(engine) as session:
+                    session.add(AuthSession(user_id=user_id, session_id=token, expiration=expiration))
+                    await session.commit()
+                async with AsyncSession(engine) as session:
+                    result = await session.exec(
+                        select(User.id, User.username).where(
+                            AuthSession.session_id == token, User.id == AuthSession.user_id
+                        )
+                    )
+                    result.first()
+            except Exception:
+                failures += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(user_id) for user_id in user_ids))
+    elapsed = time.perf_counter() - start
+
+    async with AsyncSession(engine) as session:
+        await session.exec(delete(AuthSession).where(AuthSession.user_id.in_(user_ids)))
+        await session.exec(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+    await engine.dispose()
+
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else float("nan")
+    return len(latencies) / elapsed, p95, failures
+
+
+async def run(args: argparse.Namespace) -> None:
+    profiles = POSTGRES_PROFILES if args.db_url else SQLITE_PROFILES
+    print(f"{args.workers} concurrent workers, {args.seconds:g}s per profile")
+    print(f"{'profile':<28} {'logins/sec':>11} {'p95 ms':>8} {'failed':>7}")
+    for name, profile in profiles.items():
+        # Fresh SQLite file per profile: journal_mode=wal persists in the file.
+        url = args.db_url or f"sqlite:///{tempfile.mkdtemp()}/db_profiles.db"
+        rate, p95, failures = await run_profile(url, profile, args.workers, args.seconds)
+        print(f"{name:<28} {rate:>11.1f} {p95:>8.1f} {failures:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=32, help="concurrent logins")
+    parser.add_argument("--seconds", type=float, default=5.0, help="time per profile")
+    parser.add_argument("--db-url", default=None, help="Postgres URL; SQLite temp files if omitted")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Per-hash latency of candidate password profiles on this host.
+
+    python -m benchmarks.hash_profiles [--samples 5] [--bcrypt-rounds 10 11 12 13]
+"""
+import argparse
+import time
+
+from combo_auth.password_profile import PasswordProfile
+
+PASSWORD = "correct horse battery staple"
+
+
+def candidates(args: argparse.Namespace) -> list[PasswordProfile]:
+    profiles = [PasswordProfile(bcrypt_rounds=r) for r in args.bcrypt_rounds]
+    profiles += [
+        PasswordProfile(schemes=("argon2",), argon2_time_cost=t, argon2_memory_cost=m)
+        for t, m in ((2, 19456), (3, 65536), (4, 102400))
+    ]
+    profiles += [PasswordProfile(schemes=("scrypt",), scrypt_rounds=r) for r in (14, 16)]
+    return profiles
+
+
+def describe(profile: PasswordProfile) -> str:
+    costs = {
+        k: v
+        for k, v in vars(profile).items()
+        if k != "schemes" and v is not None
+    }
+    return ",".join(profile.schemes) + " " + " ".join(f"{k}={v}" for k, v in costs.items())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=5, help="hashes per candidate")
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    args = parser.parse_args()
+
+    print(f"{'profile':<56} {'hash ms':>9} {'verify ms':>10}")
+    for profile in candidates(args):
+        context = profile.crypt_context()
+        try:
+            start = time.perf_counter()
+            for _ in range(args.samples):
+                password_hash = context.hash(PASSWORD)
+            hash_ms = (time.perf_counter() - start) * 1000 / args.samples
+        except Exception as e:
+            print(f"{describe(profile):<56} skipped: {e}")
+            continue
+        start = time.perf_counter()
+        for _ in range(args.samples):
+            context.verify(PASSWORD, password_hash)
+        verify_ms = (time.perf_counter() - start) * 1000 / args.samples
+        print(f"{describe(profile):<56} {hash_ms:>9.1f} {verify_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
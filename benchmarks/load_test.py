@@ -0,0 +1,313 @@
+"""
+End-to-end load test for the auth handlers.
+
+    python -m benchmarks.load_test --users 50
+    python -m benchmarks.load_test --users 50 --db-url postgresql://localhost/auth_bench
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from collections.abc import Awaitable, Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GOOGLE_CLIENT_ID = "load-test-client"
+PASSWORD = "load-test-password"
+
+
+class MockGoogle:
+    """Local stand-in for Google's token endpoint and signing certs.
+
+    The auth code "n" is exchanged for an ID token for google-user-n, signed with
+    a throwaway RSA key whose certificate is served from /certs.
+    """
+
+    kid = "load-test-key"
+
+    def __init__(self):
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+        from google.auth import crypt
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "load-test")])
+        now = time.time()
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(datetime_from(now - 3600))
+            .not_valid_after(datetime_from(now + 86400))
+            .sign(key, hashes.SHA256())
+        )
+        self.certs = {self.kid: cert.public_bytes(serialization.Encoding.PEM).decode()}
+        self.signer = crypt.RSASigner.from_string(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            ),
+            key_id=self.kid,
+        )
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def id_token(self, code: str) -> str:
+        from google.auth import jwt
+
+        now = int(time.time())
+        claims = {
+            "iss": "https://accounts.google.com",
+            "aud": GOOGLE_CLIENT_ID,
+            "sub": f"google-sub-{code}",
+            "email": f"google-user-{code}@example.com",
+            "name": f"Google User {code}",
+            "iat": now,
+            "exp": now + 3600,
+        }
+        return jwt.encode(self.signer, claims).decode()
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _json(self, body: dict, headers: dict | None = None):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._json(mock.certs, {"Cache-Control": "public, max-age=3600"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = urllib.parse.parse_qs(self.rfile.read(length).decode())
+                code = form["code"][0]
+                self._json(
+                    {
+                        "access_token": f"access-{code}",
+                        "expires_in": 3600,
+                        "token_type": "Bearer",
+                        "id_token": mock.id_token(code),
+                    }
+                )
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def datetime_from(timestamp: float):
+    import datetime
+
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+
+
+def configure_env(args: argparse.Namespace, google: MockGoogle) -> None:
+    """Point the app at the bench database and mock Google before it is imported."""
+    os.environ["DB_URL"] = args.db_url
+    os.environ["GOOGLE_CLIENT_ID"] = GOOGLE_CLIENT_ID
+    os.environ["GOOGLE_CLIENT_SECRET"] = "load-test-secret"
+    os.environ["GOOGLE_TOKEN_URL"] = f"{google.url}/token"
+    os.environ["GOOGLE_CERTS_URL"] = f"{google.url}/certs"
+    for name in ("AUTH_RATE_LIMIT_GLOBAL", "AUTH_RATE_LIMIT_PER_IP", "AUTH_RATE_LIMIT_PER_EMAIL"):
+        os.environ.setdefault(name, "1000000/1")
+    os.environ.setdefault("AUTH_HASH_POOL_MAX_QUEUE", "1000000")
+
+
+class StatementCounter:
+    """Counts SQL statements issued by every engine in the process."""
+
+    def __init__(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+class VirtualUser:
+    def __init__(self, n: int, run_id: str):
+        from reflex import constants
+        from reflex.state import RouterData, State
+
+        from combo_auth.login_state import LoginRegState
+
+        self.n = n
+        self.email = f"load-{run_id}-{n}@example.com"
+        self.google_code = f"{run_id}-{n}"
+        router_data = {
+            constants.RouteVar.CLIENT_TOKEN: f"{run_id}-{n}",
+            constants.RouteVar.SESSION_ID: f"sid-{run_id}-{n}",
+            constants.RouteVar.CLIENT_IP: f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}",
+            constants.RouteVar.PATH: "/",
+            constants.RouteVar.ORIGIN: "/",
+            constants.RouteVar.HEADERS: {"host": "localhost:3000"},
+            constants.RouteVar.QUERY: {},
+        }
+        kwargs = {}
+        if "_reflex_internal_init" in inspect.signature(State.__init__).parameters:
+            kwargs["_reflex_internal_init"] = True
+        self.root = State(**kwargs)
+        self.root.router_data = router_data
+        self.root.router = RouterData(router_data)
+        self.state = self.root.get_substate(LoginRegState.get_full_name().split("."))
+        self.state.auth_token = ""
+
+    async def register(self):
+        from combo_auth.login_state import LoginRegState
+
+        form = {
+            "username": f"user{self.n}",
+            "email": self.email,
+            "password": PASSWORD,
+            "confirm_password": PASSWORD,
+        }
+        async for _ in LoginRegState.handle_registration.fn(self.state, form):
+            pass
+        assert self.state.reg_success, self.state.error_message
+
+    async def login(self):
+        from combo_auth.login_state import LoginRegState
+
+        await LoginRegState.on_submit_email_login.fn(
+            self.state, {"email": self.email, "password": PASSWORD}
+        )
+        assert not self.state.error_message, self.state.error_message
+
+    async def hydrate(self):
+        """What a protected page hydrate costs: resolving authenticated_user."""
+        from combo_auth.auth_state import AuthState
+
+        computed = AuthState.computed_vars["authenticated_user"]
+        fget = getattr(computed, "fget", None) or computed._fget
+        assert not fget(self.state).is_anonymous()
+
+    async def logout(self):
+        from combo_auth.auth_state import AuthState
+
+        await AuthState.do_logout.fn(self.state)
+
+    async def google_login(self):
+        from combo_auth.login_state import LoginRegState
+
+        await LoginRegState.on_google_auth.fn(self.state, {"code": self.google_code})
+        assert not self.state.error_message, self.state.error_message
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_scenario(
+    name: str,
+    users: list[VirtualUser],
+    step: Callable[[VirtualUser], Awaitable[None]],
+    counter: StatementCounter,
+    repeat: int = 1,
+) -> None:
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(user: VirtualUser):
+        nonlocal errors
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                await step(user)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    statements_before = counter.count
+    start = time.perf_counter()
+    await asyncio.gather(*(one(user) for user in users))
+    elapsed = time.perf_counter() - start
+    statements = counter.count - statements_before
+    latencies.sort()
+    ops = len(latencies)
+    print(
+        f"{name:<10} {ops:>6} {ops / elapsed:>9.1f} "
+        f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} "
+        f"{percentile(latencies, 99) * 1000:>8.1f} {statistics.mean(latencies) * 1000:>8.1f} "
+        f"{statements:>8} {statements / ops:>7.1f} {errors:>6}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    import sqlmodel
+    from sqlalchemy import create_engine
+
+    # Imported for their side effect of registering the tables.
+    from combo_auth import auth_session, google_profile, user  # noqa: F401
+
+    sqlmodel.SQLModel.metadata.create_all(create_engine(args.db_url))
+    counter = StatementCounter()
+    run_id = uuid.uuid4().hex[:8]
+    users = [VirtualUser(n, run_id) for n in range(args.users)]
+
+    print(f"{args.users} virtual users against {args.db_url}")
+    print(
+        f"{'scenario':<10} {'ops':>6} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'mean ms':>8} {'stmts':>8} {'st/op':>7} {'errors':>6}"
+    )
+    await run_scenario("register", users, VirtualUser.register, counter)
+    await run_scenario("login", users, VirtualUser.login, counter)
+    await run_scenario("hydrate", users, VirtualUser.hydrate, counter, repeat=args.hydrates)
+    await run_scenario("logout", users, VirtualUser.logout, counter)
+    await run_scenario("google", users, VirtualUser.google_login, counter)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--hydrates", type=int, default=5, help="protected page loads per user")
+    parser.add_argument(
+        "--db-url",
+        default=None,
+        help="SQLAlchemy URL; defaults to a temporary SQLite file",
+    )
+    args = parser.parse_args()
+    if args.db_url is None:
+        args.db_url = f"sqlite:///{tempfile.mkdtemp()}/load_test.db"
+
+    google = MockGoogle()
+    google.start()
+    try:
+        configure_env(args, google)
+        asyncio.run(run(args))
+    finally:
+        google.stop()
+
+
+if __name__ == "__main__":
+    main()
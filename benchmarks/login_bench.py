@@ -0,0 +1,47 @@
+"""
+Microbenchmark for the password check in the email login path.
+
+    python -m benchmarks.login_bench [--seconds 5]
+"""
+import argparse
+import time
+from typing import Callable
+
+from combo_auth.user import User
+
+PASSWORD = "correct horse battery staple"
+
+
+def logins_per_second(fn: Callable[[], object], seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        fn()
+        count += 1
+    return count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0, help="time per scenario")
+    args = parser.parse_args()
+
+    user = User(
+        username="bench",
+        email="bench@example.com",
+        password_hash=User.hash_password(PASSWORD),
+    )
+    scenarios = {
+        "before (verify twice)": lambda: user.verify(PASSWORD) and user.verify(PASSWORD),
+        "after (verify once)": lambda: user.verify(PASSWORD),
+        "wrong password": lambda: user.verify("wrong"),
+        "unknown email (dummy verify)": User.dummy_verify,
+    }
+    print(f"{'scenario':<32} {'logins/sec/core':>16} {'ms/login':>10}")
+    for name, fn in scenarios.items():
+        rate = logins_per_second(fn, args.seconds)
+        print(f"{name:<32} {rate:>16.2f} {1000 / rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Async database access for the auth event handlers, and a sync `session()` for
+computed vars.
+"""
+import contextlib
+import datetime
+import json
+from collections.abc import AsyncIterator
+
+from sqlalchemy import Engine, bindparam, create_engine, delete, func, or_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from reflex.config import get_config
+
+from . import metrics
+from .auth_session import AuthSession
+from .db_profile import DbProfile
+from .google_profile import GoogleProfile
+from .user import User, normalize_email
+
+# Sync driver -> async driver for the same database.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_engine: AsyncEngine | None = None
+_sync_engine: Engine | None = None
+
+
+def async_db_url(db_url: str) -> str:
+    """Rewrite a sync SQLAlchemy URL to use the matching async driver."""
+    scheme, sep, rest = db_url.partition("://")
+    return ASYNC_DRIVERS.get(scheme.split("+")[0], scheme) + sep + rest
+
+
+def _db_url() -> str:
+    return get_config().db_url or "sqlite:///reflex.db"
+
+
+def get_async_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        profile = DbProfile.from_config()
+        url = async_db_url(_db_url())
+        _engine = create_async_engine(url, **profile.engine_kwargs(url))
+        profile.apply(_engine.sync_engine)
+    return _engine
+
+
+def get_sync_engine() -> Engine:
+    global _sync_engine
+    if _sync_engine is None:
+        profile = DbProfile.from_config()
+        url = _db_url()
+        _sync_engine = profile.apply(create_engine(url, **profile.engine_kwargs(url)))
+    return _sync_engine
+
+
+def session() -> Session:
+    """Like rx.session(), but on a shared engine tuned by the DbProfile."""
+    return Session(get_sync_engine())
+
+
+@contextlib.asynccontextmanager
+async def asession() -> AsyncIterator[AsyncSession]:
+    """An async counterpart to rx.session()."""
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+@metrics.phase("db")
+async def get_user_by_email(email_normalized: str) -> User | None:
+    """Look up a User by `normalize_email(email)`, via ix_user_email_normalized."""
+    async with asession() as session:
+        result = await session.exec(select(User).where(User.email_normalized == email_normalized))
+        return result.first()
+
+
+@metrics.phase("db")
+async def get_google_profile(user_id: str) -> dict | None:
+    """The stored Google ID token claims for user_id, if they signed in with Google."""
+    async with asession() as session:
+        result = await session.exec(
+            select(GoogleProfile.profile).where(GoogleProfile.user_id == user_id)
+        )
+        profile = result.first()
+        return json.loads(profile) if profile is not None else None
+
+
+@metrics.phase("db")
+async def get_user(user_id: str) -> User | None:
+    """Load the full User row, e.g. for the authenticated Principal."""
+    async with asession() as session:
+        return await session.get(User, user_id)
+
+
+class EmailAlreadyRegistered(Exception):
+    """A new User's email is already taken (unique violation on ix_user_email_normalized)."""
+
+
+def _is_email_conflict(error: IntegrityError) -> bool:
+    # SQLite: "UNIQUE constraint failed: user.email_normalized"; Postgres names the
+    # index. Either also matches a conflict on the raw email column.
+    message = str(error.orig)
+    return "ix_user_email" in message or "user.email" in message
+
+
+@metrics.phase("db")
+async def create_user(user: User) -> User:
+    """Insert a new User without checking for its email first.
+
+    The unique index on email decides, so two concurrent registrations for the
+    same address can't both succeed and neither needs a prior SELECT.
+
+    Raises:
+        EmailAlreadyRegistered: If a User with this email already exists.
+    """
+    async with asession() as session:
+        session.add(user)
+        try:
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            if _is_email_conflict(e):
+                raise EmailAlreadyRegistered(user.email) from e
+            raise
+        return user
+
+
+@metrics.phase("db")
+async def resolve_google_user(google_user_info: dict) -> User:
+    """Find, link or create the User for a verified Google identity.
+
+    One query matches on google_sub or normalized email (both indexed), with the
+    user's GoogleProfile outer-joined. An existing Google user is returned as is;
+    an email match is linked to the Google account (its GoogleProfile row is
+    created or updated); otherwise a new User is created. That write is a single
+    transaction, and if a concurrent first login for the same account commits
+    first, the unique indexes reject ours and the winner's row is returned instead.
+
+    Args:
+        google_user_info: The verified ID token claims.
+    """
+    google_sub = google_user_info["sub"]
+    email = google_user_info["email"].strip()
+    email_normalized = normalize_email(email)
+    async with asession() as session:
+        matches = (
+            await session.exec(
+                select(User, GoogleProfile)
+                .join(GoogleProfile, GoogleProfile.user_id == User.id, isouter=True)
+                .where(
+                    or_(User.google_sub == google_sub, User.email_normalized == email_normalized)
+                )
+            )
+        ).all()
+        for user, _ in matches:
+            if user.google_sub == google_sub:
+                return user
+        if matches:
+            # Link the existing email account to this Google account. It may
+            # already have a profile row (linked before under another sub, or
+            # migrated from user.google_token), which is updated in place.
+            user, profile = matches[0]
+            user.google_sub = google_sub
+        else:
+            user = User(
+                username=google_user_info["name"],
+                email=email,
+                email_normalized=email_normalized,
+                google_sub=google_sub,
+            )
+            profile = None
+        if profile is None:
+            profile = GoogleProfile(user_id=user.id)  # type: ignore
+        profile.profile = json.dumps(google_user_info)
+        session.add(user)
+        session.add(profile)
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            user = (
+                await session.exec(select(User).where(User.google_sub == google_sub))
+            ).first()
+            if user is None:
+                raise
+        return user
+
+
+@metrics.phase("db")
+async def update_password_hash(user_id: str, password_hash: str) -> None:
+    async with asession() as session:
+        await session.exec(
+            update(User).where(User.id == user_id).values(password_hash=password_hash)
+        )
+        await session.commit()
+
+
+@metrics.phase("db")
+async def upsert_auth_session(
+    user_id: str,
+    session_id: str,
+    expiration: datetime.datetime,
+    lifetime_seconds: int | None = None,
+) -> None:
+    """Bind session_id to user_id, replacing any existing row for session_id.
+
+    Uses a single INSERT ... ON CONFLICT (session_id) DO UPDATE on SQLite and
+    Postgres; other dialects fall back to delete + insert in one transaction.
+
+    Args:
+        lifetime_seconds: The session's lifetime, used by sliding renewal;
+            None for a session that should not be renewed.
+    """
+    values = {
+        "user_id": user_id,
+        "session_id": session_id,
+        "expiration": expiration,
+        "lifetime_seconds": lifetime_seconds,
+    }
+    insert = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}.get(
+        get_async_engine().dialect.name
+    )
+    async with asession() as session:
+        if insert is not None:
+            statement = insert(AuthSession).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=[AuthSession.session_id],
+                set_={
+                    "user_id": statement.excluded.user_id,
+                    "expiration": statement.excluded.expiration,
+                    "lifetime_seconds": statement.excluded.lifetime_seconds,
+                },
+            )
+            await session.exec(statement)
+        else:
+            await session.exec(delete(AuthSession).where(AuthSession.session_id == session_id))
+            session.add(AuthSession(**values))  # type: ignore
+        await session.commit()
+
+
+@metrics.phase("db")
+async def extend_auth_sessions(expirations: dict[str, datetime.datetime]) -> int:
+    """Move the expiration of many AuthSessions forward in one executemany UPDATE.
+
+    A row is only updated if its expiration is earlier than the new one, so a
+    late flush never shortens a session that was re-created by a new login.
+
+    Args:
+        expirations: session_id -> new expiration.
+
+    Returns:
+        The number of rows updated, if the driver reports it.
+    """
+    if not expirations:
+        return 0
+    table = AuthSession.__table__
+    statement = (
+        update(table)
+        .where(
+            table.c.session_id == bindparam("b_session_id"),
+            table.c.expiration < bindparam("b_expiration"),
+        )
+        .values(expiration=bindparam("b_expiration"))
+    )
+    params = [
+        {"b_session_id": session_id, "b_expiration": expiration}
+        for session_id, expiration in expirations.items()
+    ]
+    async with get_async_engine().begin() as connection:
+        result = await connection.execute(statement, params)
+        return result.rowcount
+
+
+@metrics.phase("db")
+async def delete_auth_session(session_id: str) -> int:
+    """Delete the AuthSession for session_id in one statement.
+
+    Returns:
+        The number of rows deleted.
+    """
+    async with asession() as session:
+        result = await session.exec(delete(AuthSession).where(AuthSession.session_id == session_id))
+        await session.commit()
+        return result.rowcount
+
+
+@metrics.phase("db")
+async def delete_user_auth_sessions(user_id: str) -> int:
+    """Delete every AuthSession for user_id in one statement (via ix_authsession_user_id).
+
+    Returns:
+        The number of rows deleted.
+    """
+    async with asession() as session:
+        result = await session.exec(delete(AuthSession).where(AuthSession.user_id == user_id))
+        await session.commit()
+        return result.rowcount
+
+
+@metrics.phase("db")
+async def delete_expired_auth_sessions(before: datetime.datetime, limit: int) -> int:
+    """Delete up to limit AuthSessions that expired before the given time.
+
+    Returns:
+        The number of rows deleted.
+    """
+    async with asession() as session:
+        expired_ids = (
+            select(AuthSession.id).where(AuthSession.expiration < before).limit(limit)
+        )
+        result = await session.exec(delete(AuthSession).where(AuthSession.id.in_(expired_ids)))
+        await session.commit()
+        return result.rowcount
+
+
+@metrics.phase("db")
+async def count_active_sessions() -> int:
+    async with asession() as session:
+        result = await session.exec(
+            select(func.count()).select_from(AuthSession).where(
+                AuthSession.expiration >= datetime.datetime.now(datetime.timezone.utc)
+            )
+        )
+        return result.one()
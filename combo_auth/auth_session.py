@@ -14,5 +14,10 @@ class AuthSession(
     user_id: str = Field(index=True, nullable=False)
     session_id: str = Field(unique=True, index=True, nullable=False)
     expiration: datetime.datetime = Field(
-        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
+        sa_column=Column(
+            DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+        ),
     )
+    # The lifetime the session was issued with; sliding renewal extends it by
+    # this much. None means a fixed expiration that is never renewed.
+    lifetime_seconds: int | None = Field(default=None, nullable=True)
@@ -4,15 +4,22 @@ Top-level State for the App.
 Authentication data is stored in the base State class so that all substates can
 access it for verifying access to event handlers and computed vars.
 """
+import dataclasses
 import datetime
+import logging
+from collections.abc import Callable
 
-from sqlmodel import select, Session
+from sqlmodel import select
 from google.auth.transport import requests
 from google.oauth2.id_token import verify_oauth2_token
 
 import reflex as rx
 
+from . import auth_db, metrics, signed_token
 from .auth_session import AuthSession
+from .principal import ANONYMOUS, Principal
+from .session_cache import session_cache
+from .session_renewal import session_renewals
 from .user import User, ANON_SENITINEL
 
 LOGIN_ROUTE = "/"
@@ -21,35 +28,94 @@ REGISTER_ROUTE = "/register"
 AUTH_TOKEN_LOCAL_STORAGE_KEY = "_auth_token"
 DEFAULT_AUTH_SESSION_EXPIRATION_DELTA = datetime.timedelta(days=7)
 
+LOGOUT_EVERYWHERE_STATELESS_MESSAGE = (
+    "Logging out of every session requires AUTH_SESSION_MODE=table."
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class RoutePolicy:
+    """Who may view a protected route, and where everyone else is sent.
+
+    Attributes:
+        redirect_to: Where anonymous visitors are redirected.
+        allow: Optional check on the authenticated Principal, e.g. an email
+            domain or an allow-list; users it rejects go to denied_to.
+        denied_to: Where users rejected by allow are redirected; defaults to
+            redirect_to.
+    """
+
+    redirect_to: str = LOGIN_ROUTE
+    allow: Callable[[Principal], bool] | None = None
+    denied_to: str | None = None
+
+
+# Route -> policy, filled in by `protected_page`.
+ROUTE_POLICIES: dict[str, RoutePolicy] = {}
+
 
 class AuthState(rx.State):
     # The auth_token is stored in local storage to persist across tab and browser sessions.
     auth_token: str = rx.SessionStorage(name=AUTH_TOKEN_LOCAL_STORAGE_KEY)
-    user: User = User(username=ANON_SENITINEL) 
+    user: Principal = ANONYMOUS
     redirect_to: str = ""
 
     @rx.var(cache=True)
-    def authenticated_user(self) -> User:
-        """The currently authenticated user, or a dummy user if not authenticated.
+    def authenticated_user(self) -> Principal:
+        """The currently authenticated user, or the anonymous principal if not authenticated.
 
         Returns:
-            A User instance with id=-1 if not authenticated, or the User instance
-            corresponding to the currently authenticated user.
+            ANONYMOUS if not authenticated, or a Principal for the currently
+            authenticated user. Use auth_db.get_user to load the full User row.
         """
-        with rx.session() as session:
-            result = session.exec(
-                select(User, AuthSession).where(
-                    AuthSession.session_id == self.auth_token,
-                    AuthSession.expiration
-                    >= datetime.datetime.now(datetime.timezone.utc),
-                    User.id == AuthSession.user_id,
-                ),
-            ).first()
-            if result:
-                user, auth_session = result
+        with metrics.track("authenticated_user"):
+            if not self.auth_token:
+                return ANONYMOUS
+            if signed_token.STATELESS:
+                claims = signed_token.read_token(self.auth_token)
+                if claims is None:
+                    return ANONYMOUS
+                user = Principal(id=claims["sub"], username=claims["name"], email=claims["email"])
                 self.user = user
                 return user
-        return User(username=ANON_SENITINEL)
+            cached = session_cache.get(self.auth_token)
+            if cached is not None:
+                self.user = cached
+                return cached
+            with metrics.timer("db"), auth_db.session() as session:
+                result = session.exec(
+                    select(
+                        User.id,
+                        User.username,
+                        User.email,
+                        User.enabled,
+                        AuthSession.expiration,
+                        AuthSession.lifetime_seconds,
+                    ).where(
+                        AuthSession.session_id == self.auth_token,
+                        AuthSession.expiration
+                        >= datetime.datetime.now(datetime.timezone.utc),
+                        User.id == AuthSession.user_id,
+                    ),
+                ).first()
+                if result:
+                    user_id, username, email, enabled, expiration, lifetime_seconds = result
+                    user = Principal(id=user_id, username=username, email=email, enabled=enabled)
+                    if lifetime_seconds:
+                        expiration = (
+                            session_renewals.maybe_renew(
+                                self.auth_token,
+                                expiration,
+                                datetime.timedelta(seconds=lifetime_seconds),
+                            )
+                            or expiration
+                        )
+                    session_cache.put(self.auth_token, user, expiration)
+                    self.user = user
+                    return user
+            return ANONYMOUS
 
     @rx.var(cache=True)
     def is_authenticated(self) -> bool:
@@ -60,97 +126,204 @@ class AuthState(rx.State):
         """
         return not self.authenticated_user.is_anonymous()
 
-    def do_logout(self) -> None:
+    @metrics.instrument("do_logout")
+    async def do_logout(self) -> None:
         """Destroy AuthSessions associated with the auth_token."""
-        with rx.session() as session:
-            for auth_session in session.exec(
-                select(AuthSession).where(AuthSession.session_id == self.auth_token)
-            ).all():
-                session.delete(auth_session)
-            session.commit()
+        if signed_token.STATELESS:
+            claims = signed_token.read_token(self.auth_token)
+            if claims is not None:
+                signed_token.denylist.revoke(claims)
+            self.auth_token = ""
+            return
+        await auth_db.delete_auth_session(self.auth_token)
+        session_cache.invalidate(self.auth_token)
+        session_renewals.discard(self.auth_token)
         self.auth_token = self.auth_token
 
-    def scavange_auth_session(self, session: Session, session_id: str):
-        statement = select(AuthSession).where(AuthSession.session_id == session_id)
-        result = session.exec(statement).first()       
-        if result:
-            # Delete the record if found
-            session.delete(result)
-            session.commit()
+    async def _logout_everywhere(self) -> int:
+        """Revoke every AuthSession belonging to the authenticated user.
+
+        Returns:
+            The number of sessions revoked.
+
+        Raises:
+            signed_token.SessionModeError: In stateless mode. Tokens on other
+                browsers are checked by other workers, which a per-process
+                denylist can't reach.
+        """
+        if signed_token.STATELESS:
+            raise signed_token.SessionModeError(LOGOUT_EVERYWHERE_STATELESS_MESSAGE)
+        user = self.authenticated_user
+        if user.is_anonymous():
+            return 0
+        revoked = await auth_db.delete_user_auth_sessions(user.id)
+        session_cache.invalidate_user(user.id)
+        self.auth_token = self.auth_token
+        return revoked
+
+    async def do_logout_everywhere(self) -> rx.event.EventSpec | None:
+        """Log the current user out of every browser session."""
+        if signed_token.STATELESS:
+            return rx.window_alert(LOGOUT_EVERYWHERE_STATELESS_MESSAGE)
+        await self._logout_everywhere()
 
     def redir(self) -> rx.event.EventSpec | None:
-        """Redirect to the redirect_to route if logged in, or to the login page if not."""
-        if not self.is_hydrated:
-            # wait until after hydration to ensure auth_token is known
-            return AuthState.redir()  # type: ignore
-        print("Got in AuthState redir")
+        """Redirect to the redirect_to route if logged in, or to the login page if not.
+
+        Chained from the login handlers to send the user back to the page that
+        asked them to log in. Protected pages don't use it; declare them with
+        `protected_page`, whose guard_route records redirect_to.
+        """
         page = self.router.page.path
+        logger.debug("redir page=%s authenticated=%s", page, self.is_authenticated)
         if not self.is_authenticated and page != LOGIN_ROUTE:
             self.redirect_to = page
             return rx.redirect(LOGIN_ROUTE)
         elif page == LOGIN_ROUTE:
             return rx.redirect(self.redirect_to or "/home")
 
-    def _login(
+    def guard_route(self) -> rx.event.EventSpec | None:
+        """Enforce the current route's RoutePolicy; registered by `protected_page`.
+
+        Runs in the page's on_load chain, so the session is resolved through the
+        cached authenticated_user lookup and a visitor who may not see the page
+        is redirected before any of it renders. Routes without a policy (pages
+        using only `require_login`, whose spinner fires this on mount) get the
+        default one: anonymous visitors go to the login page.
+        """
+        route = self.router.page.path
+        policy = ROUTE_POLICIES.get(route) or RoutePolicy()
+        user = self.authenticated_user
+        if user.is_anonymous():
+            logger.debug("guard_route %s: anonymous, redirecting", route)
+            self.redirect_to = self.router.page.raw_path or route
+            return rx.redirect(policy.redirect_to)
+        if policy.allow is not None and not policy.allow(user):
+            logger.debug("guard_route %s: denied user=%s", route, user.id)
+            return rx.redirect(policy.denied_to or policy.redirect_to)
+        return None
+
+    @metrics.instrument("_login")
+    async def _login(
         self,
         user_id: str,
         username: str,
+        email: str = "",
         expiration_delta: datetime.timedelta = DEFAULT_AUTH_SESSION_EXPIRATION_DELTA,
     ) -> None:
         """Create an AuthSession for the given user_id.
 
-        If the auth_token is already associated with an AuthSession, it will be
-        logged out first.
+        If the auth_token is already associated with an AuthSession, that row is
+        replaced by the same upsert statement. In stateless mode no row is
+        written; auth_token becomes a signed token for the user instead.
 
         Args:
             user_id: The user ID to associate with the AuthSession.
-            expiration_delta: The amount of time before the AuthSession expires.
+            username: The user's name.
+            email: The user's email, carried in stateless tokens.
+            expiration_delta: The amount of time before the AuthSession expires,
+                and how far sliding renewal extends it.
         """
-        if self.is_authenticated:
-            self.do_logout()
         if username == ANON_SENITINEL:
+            if self.is_authenticated:
+                await self.do_logout()
             return
-        self.auth_token = self.auth_token or self.router.session.client_token
-        with rx.session() as session:
-            self.scavange_auth_session(session, self.auth_token)
-            session.add(
-                AuthSession(  # type: ignore
-                    user_id=user_id,
-                    session_id=self.auth_token,
-                    expiration=datetime.datetime.now(datetime.timezone.utc)
-                    + expiration_delta,
-                )
+        expiration = datetime.datetime.now(datetime.timezone.utc) + expiration_delta
+        if signed_token.STATELESS:
+            self.auth_token = signed_token.issue_token(
+                user_id, username, email, expiration.timestamp()
             )
-            session.commit()
+            return
+        self.auth_token = self.auth_token or self.router.session.client_token
+        await auth_db.upsert_auth_session(
+            user_id=user_id,
+            session_id=self.auth_token,
+            expiration=expiration,
+            lifetime_seconds=int(expiration_delta.total_seconds()),
+        )
+        session_cache.invalidate(self.auth_token)
 
     def home_page_load(self):
         if self.user.is_anonymous():
             return
-        print("Home page load handler is running")
+        logger.debug("home_page_load user=%s", self.user.id)
 
 def require_login(page: rx.app.ComponentCallable) -> rx.app.ComponentCallable:
     """Decorator to require authentication before rendering a page. This
        decorator checks the "local user" authentication state - it says nothing
        about the Google auth or other browser state.
 
+       Anonymous visitors see a spinner, which runs AuthState.guard_route when
+       it mounts to send them to the login page. `protected_page` guards in
+       on_load instead, before anything renders, and is preferred for new pages.
+
     Args:
         page: The page to wrap.
 
     Returns:
         The wrapped page component.
     """
+    return _render_when_authenticated(page, on_mount=AuthState.guard_route)
+
+
+def _render_when_authenticated(
+    page: rx.app.ComponentCallable, on_mount: rx.event.EventHandler | None = None
+) -> rx.app.ComponentCallable:
+    """Render page for an authenticated user and a spinner for everyone else."""
 
     def protected_page():
+        if on_mount is None:
+            spinner = rx.chakra.spinner()
+        else:
+            spinner = rx.chakra.spinner(on_mount=on_mount)
         return rx.fragment(
             rx.cond(
                 AuthState.is_hydrated & AuthState.is_authenticated,  # type: ignore
                 page(),
-                rx.chakra.center(
-                    # When this spinner mounts, it will redirect to the login page
-                    rx.chakra.spinner(on_mount=AuthState.redir),
-                ),
+                rx.chakra.center(spinner),
             )
         )
 
     protected_page.__name__ = page.__name__
     return protected_page
+
+
+def protected_page(
+    route: str,
+    *,
+    redirect_to: str = LOGIN_ROUTE,
+    allow: Callable[[Principal], bool] | None = None,
+    denied_to: str | None = None,
+    on_load: rx.event.EventHandler | list[rx.event.EventHandler] | None = None,
+    **page_kwargs,
+) -> Callable[[rx.app.ComponentCallable], rx.app.ComponentCallable]:
+    """Register a page whose access policy is declared once, with the route.
+
+    Combines `rx.page`, the rendering half of `require_login` and an
+    `AuthState.guard_route` on_load handler that runs before the page's own
+    on_load handlers.
+
+        @protected_page("/admin", allow=lambda user: user.email.endswith("@example.com"))
+        def admin_page(): ...
+
+    Args:
+        route: The page route.
+        redirect_to: Where anonymous visitors are redirected.
+        allow: Optional check on the authenticated Principal.
+        denied_to: Where users rejected by allow are redirected.
+        on_load: The page's own on_load handler(s).
+        **page_kwargs: Passed through to `rx.page`.
+    """
+    route = "/" + route.strip("/")
+    ROUTE_POLICIES[route] = RoutePolicy(redirect_to=redirect_to, allow=allow, denied_to=denied_to)
+    if on_load is None:
+        on_load = []
+    elif not isinstance(on_load, list):
+        on_load = [on_load]
+
+    def decorator(page: rx.app.ComponentCallable) -> rx.app.ComponentCallable:
+        return rx.page(route=route, on_load=[AuthState.guard_route, *on_load], **page_kwargs)(
+            _render_when_authenticated(page)
+        )
+
+    return decorator
@@ -5,7 +5,14 @@ from .register_page import registration_page as registration_page
 from .login_page import login_page
 from .home_page import protected_homepage
 from .settings import settings_page
+from .session_reaper import run_session_reaper
+from .session_renewal import run_session_renewer
+from . import metrics
 
 from .user import User
 
 app = rx.App()
+app.register_lifespan_task(run_session_reaper)
+app.register_lifespan_task(run_session_renewer)
+if metrics.AUTH_METRICS_ENABLED:
+    app.api.add_api_route("/metrics", metrics.metrics_endpoint)
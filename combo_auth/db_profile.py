@@ -0,0 +1,95 @@
+"""
+Connection tuning for the auth database, from the auth_db_* fields in rxconfig.py.
+"""
+import dataclasses
+import logging
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class DbProfile:
+    sqlite_journal_mode: str | None = "wal"
+    sqlite_busy_timeout_ms: int | None = 5000
+    sqlite_synchronous: str | None = "normal"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_pre_ping: bool = True
+    statement_timeout_ms: int | None = 5000
+
+    @classmethod
+    def from_config(cls, config: Any = None) -> "DbProfile":
+        """Read the auth_db_* fields of the app config; missing fields keep their defaults."""
+        if config is None:
+            from reflex.config import get_config
+
+            config = get_config()
+        values = {}
+        for field in dataclasses.fields(cls):
+            name = f"auth_db_{field.name}"
+            if hasattr(config, name):
+                values[field.name] = getattr(config, name)
+        return cls(**values)
+
+    def engine_kwargs(self, url: str) -> dict[str, Any]:
+        """Keyword arguments for create_engine/create_async_engine on url.
+
+        Pool sizing is only passed when the dialect pools connections with a
+        QueuePool; SQLite :memory: databases, and aiosqlite files before
+        SQLAlchemy 2.0.38, use pools that reject pool_size and max_overflow.
+        """
+        parsed = make_url(url)
+        backend = parsed.get_backend_name()
+        kwargs: dict[str, Any] = {}
+        if issubclass(parsed.get_dialect().get_pool_class(parsed), QueuePool):
+            kwargs.update(pool_size=self.pool_size, max_overflow=self.max_overflow)
+        if backend == "sqlite":
+            kwargs["connect_args"] = {"check_same_thread": False}
+            return kwargs
+        kwargs["pool_pre_ping"] = self.pool_pre_ping
+        if backend == "postgresql" and self.statement_timeout_ms is not None:
+            if parsed.get_driver_name() == "asyncpg":
+                kwargs["connect_args"] = {
+                    "server_settings": {"statement_timeout": str(self.statement_timeout_ms)}
+                }
+            else:
+                kwargs["connect_args"] = {
+                    "options": f"-c statement_timeout={self.statement_timeout_ms}"
+                }
+        return kwargs
+
+    def sqlite_pragmas(self) -> list[str]:
+        pragmas = []
+        if self.sqlite_journal_mode:
+            pragmas.append(f"PRAGMA journal_mode={self.sqlite_journal_mode}")
+        if self.sqlite_busy_timeout_ms is not None:
+            pragmas.append(f"PRAGMA busy_timeout={int(self.sqlite_busy_timeout_ms)}")
+        if self.sqlite_synchronous:
+            pragmas.append(f"PRAGMA synchronous={self.sqlite_synchronous}")
+        return pragmas
+
+    def apply(self, engine: Engine) -> Engine:
+        """Install the per-connection settings on a sync engine (or an async engine's sync_engine)."""
+        if engine.dialect.name != "sqlite":
+            return engine
+        pragmas = self.sqlite_pragmas()
+        if not pragmas:
+            return engine
+
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+        logger.debug("SQLite connections for %s will run %s", engine.url, pragmas)
+        return engine
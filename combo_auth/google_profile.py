@@ -0,0 +1,17 @@
+from sqlmodel import Field
+
+import reflex as rx
+
+
+class GoogleProfile(
+    rx.Model,
+    table=True,  # type: ignore
+):
+    """The decoded Google ID token claims for a User.
+
+    Kept out of the user table so the hot-path User queries don't drag the JSON
+    blob along; load it only when a page needs the Google profile.
+    """
+
+    user_id: str = Field(unique=True, index=True, nullable=False)
+    profile: str = Field(nullable=False)
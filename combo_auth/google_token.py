@@ -0,0 +1,132 @@
+"""
+Async exchange of Google auth codes for tokens, with a timeout and bounded retries.
+"""
+import asyncio
+import os
+import threading
+from typing import Any
+
+import httpx
+
+from . import metrics
+
+GOOGLE_TOKEN_URL = os.environ.get("GOOGLE_TOKEN_URL", "https://www.googleapis.com/oauth2/v4/token")
+GOOGLE_TOKEN_TIMEOUT_SECONDS = float(os.environ.get("GOOGLE_TOKEN_TIMEOUT", "10"))
+GOOGLE_TOKEN_RETRIES = int(os.environ.get("GOOGLE_TOKEN_RETRIES", "2"))
+GOOGLE_TOKEN_MAX_CONNECTIONS = int(os.environ.get("GOOGLE_TOKEN_MAX_CONNECTIONS", "20"))
+
+RETRY_BACKOFF_SECONDS = 0.2
+# Failures where the request never reached the token endpoint.
+_RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class GoogleTokenError(Exception):
+    """The token endpoint rejected the code or could not be reached."""
+
+
+class GoogleTokenClient:
+    """Exchanges OAuth auth codes for tokens over a shared connection pool.
+
+    Args:
+        client_id: The Google OAuth client ID.
+        client_secret: The Google OAuth client secret.
+        token_url: The token endpoint.
+        timeout: Seconds allowed for each attempt.
+        retries: Extra attempts after a retryable failure.
+        max_connections: Size of the keep-alive connection pool.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        token_url: str = GOOGLE_TOKEN_URL,
+        timeout: float = GOOGLE_TOKEN_TIMEOUT_SECONDS,
+        retries: int = GOOGLE_TOKEN_RETRIES,
+        max_connections: int = GOOGLE_TOKEN_MAX_CONNECTIONS,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        self.timeout = timeout
+        self.retries = retries
+        self.max_connections = max_connections
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers={"Accept": "application/json"},
+            )
+        return self._client
+
+    @metrics.phase("google")
+    async def exchange_code(self, code: str, redirect_uri: str) -> dict[str, Any]:
+        """Exchange an authorization code for tokens.
+
+        Returns:
+            The token response, including "id_token" and, on first consent,
+            "refresh_token".
+
+        Raises:
+            GoogleTokenError: If the code is rejected or every attempt failed.
+        """
+        data = {
+            "grant_type": "authorization_code",
+            "code": code,
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "redirect_uri": redirect_uri,
+        }
+        last_error: Exception | None = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            try:
+                response = await self._get_client().post(self.token_url, data=data)
+            except _RETRYABLE_ERRORS as e:
+                last_error = e
+                continue
+            except httpx.HTTPError as e:
+                raise GoogleTokenError(f"Token exchange failed: {e!r}") from e
+            if response.status_code == 429 or response.status_code >= 500:
+                last_error = GoogleTokenError(f"Token endpoint returned {response.status_code}")
+                continue
+            if response.is_error:
+                raise GoogleTokenError(
+                    f"Token endpoint returned {response.status_code}: {response.text}"
+                )
+            return response.json()
+        raise GoogleTokenError(
+            f"Token exchange failed after {self.retries + 1} attempts"
+        ) from last_error
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_client: GoogleTokenClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_google_token_client(client_id: str, client_secret: str) -> GoogleTokenClient:
+    """The process-wide token client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GoogleTokenClient(client_id, client_secret)
+        return _client
+
+
+def set_google_token_client(client: GoogleTokenClient | None) -> None:
+    """Replace the process-wide token client, e.g. with one for a mock server."""
+    global _client
+    with _client_lock:
+        _client = client
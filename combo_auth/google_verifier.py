@@ -0,0 +1,154 @@
+"""
+Process-wide verifier for Google ID tokens, with pooled HTTP and cached certs.
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Any
+
+import requests
+from google.auth import transport
+from google.auth.transport import requests as gauth_requests
+from google.oauth2 import id_token
+
+from . import metrics
+
+GOOGLE_CERTS_URL = os.environ.get(
+    "GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs"
+)
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def _cache_seconds(headers: dict) -> int:
+    """How long a response may be cached, from its Cache-Control and Age headers."""
+    headers = {k.lower(): v for k, v in headers.items()}
+    cache_control = headers.get("cache-control", "")
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE.search(cache_control)
+    if not match:
+        return 0
+    return max(0, int(match.group(1)) - int(headers.get("age", "0") or 0))
+
+
+class CachingCertsRequest(transport.Request):
+    """Wraps a transport Request, caching GET responses per their Cache-Control."""
+
+    def __init__(self, request: transport.Request):
+        self._request = request
+        self._cache: dict[str, tuple[float, transport.Response]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        if method != "GET":
+            return self._request(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+        with self._lock:
+            cached = self._cache.get(url)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        response = self._request(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+        ttl = _cache_seconds(response.headers) if response.status == 200 else 0
+        with self._lock:
+            if ttl:
+                self._cache[url] = (time.monotonic() + ttl, response)
+            else:
+                self._cache.pop(url, None)
+        return response
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+class _StaticResponse(transport.Response):
+    def __init__(self, data: bytes):
+        self._data = data
+
+    @property
+    def status(self):
+        return 200
+
+    @property
+    def headers(self):
+        return {"content-type": "application/json", "cache-control": "max-age=3600"}
+
+    @property
+    def data(self):
+        return self._data
+
+
+class StaticCertsRequest(transport.Request):
+    """A transport that answers every request with fixed certs, for offline tests.
+
+    Args:
+        certs: Either Google's v1 format ({kid: PEM certificate}) or a JWKS
+            ({"keys": [...]}, which needs PyJWT installed to verify).
+    """
+
+    def __init__(self, certs: dict[str, Any]):
+        self._response = _StaticResponse(json.dumps(certs).encode("utf-8"))
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        return self._response
+
+
+class GoogleIdTokenVerifier:
+    """Verifies Google ID tokens against cached signing certs.
+
+    Args:
+        client_id: The expected audience of the tokens.
+        request: Transport used to fetch certs. Defaults to a pooled
+            requests.Session.
+        certs_url: Where to fetch the signing certs from.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        request: transport.Request | None = None,
+        certs_url: str = GOOGLE_CERTS_URL,
+    ):
+        if request is None:
+            request = gauth_requests.Request(session=requests.Session())
+        self.client_id = client_id
+        self.certs_url = certs_url
+        self.request = CachingCertsRequest(request)
+
+    @metrics.phase("google")
+    def verify(self, token: str) -> dict[str, Any]:
+        """Verify token and return its claims.
+
+        Raises:
+            ValueError: If the token is invalid, expired, for another audience
+                or not issued by Google.
+        """
+        claims = id_token.verify_token(
+            token, self.request, audience=self.client_id, certs_url=self.certs_url
+        )
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+
+_verifier: GoogleIdTokenVerifier | None = None
+_verifier_lock = threading.Lock()
+
+
+def get_google_verifier(client_id: str) -> GoogleIdTokenVerifier:
+    """The process-wide verifier, created on first use."""
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None:
+            _verifier = GoogleIdTokenVerifier(client_id)
+        return _verifier
+
+
+def set_google_verifier(verifier: GoogleIdTokenVerifier | None) -> None:
+    """Replace the process-wide verifier, e.g. with one using StaticCertsRequest."""
+    global _verifier
+    with _verifier_lock:
+        _verifier = verifier
@@ -0,0 +1,82 @@
+"""
+A bounded thread or process pool for running password hashing off the event loop.
+"""
+import asyncio
+import concurrent.futures
+import os
+from typing import Any, Callable
+
+from . import metrics
+
+HASH_POOL_KIND = os.environ.get("AUTH_HASH_POOL", "thread")
+HASH_POOL_WORKERS = int(os.environ.get("AUTH_HASH_POOL_WORKERS", str(os.cpu_count() or 1)))
+HASH_POOL_MAX_QUEUE = int(os.environ.get("AUTH_HASH_POOL_MAX_QUEUE", "64"))
+
+
+class HashPoolBusy(Exception):
+    """Raised when the hash pool already has max_queue callers waiting."""
+
+
+class HashPool:
+    """Bounded executor for CPU-bound hashing calls.
+
+    Args:
+        kind: "thread" or "process". bcrypt releases the GIL, so threads are
+            usually enough; use processes for pure-Python hash backends.
+        workers: Maximum number of hashes running at once.
+        max_queue: Maximum number of callers waiting for a free worker.
+    """
+
+    def __init__(self, kind: str, workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hash pool kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self._executor: concurrent.futures.Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._in_flight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a worker."""
+        return max(0, self._in_flight - self.workers)
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="hash_pool"
+                )
+        return self._executor
+
+    @metrics.phase("hash")
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) on the pool and return its result.
+
+        With a process pool, fn and args must be picklable.
+
+        Raises:
+            HashPoolBusy: If max_queue callers are already waiting.
+        """
+        if self.queue_depth >= self.max_queue:
+            raise HashPoolBusy()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        self._in_flight += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._in_flight -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+hash_pool = HashPool(HASH_POOL_KIND, HASH_POOL_WORKERS, HASH_POOL_MAX_QUEUE)
@@ -1,13 +1,12 @@
 import reflex as rx
 
-from .auth_state import AuthState, require_login
+from .auth_state import AuthState, protected_page
 
-@rx.page(route="/home", on_load=AuthState.home_page_load)
-@require_login
+@protected_page("/home", on_load=AuthState.home_page_load)
 def protected_homepage() -> rx.Component:
     """Render a protected page.
 
-    The `require_login` decorator will redirect to the login page if the user is
+    The `protected_page` decorator will redirect to the login page if the user is
     not authenticated.
 
     Returns:
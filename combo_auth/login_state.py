@@ -1,29 +1,44 @@
 import asyncio
 from collections.abc import AsyncGenerator
-import json
 import os
 import traceback
-# Google auth
-from google.oauth2.id_token import verify_oauth2_token
-from google.auth.transport import requests as gauth_requests
-from requests_oauthlib import OAuth2Session
 
-from sqlmodel import select
 import reflex as rx
 
+from . import auth_db, metrics
 from .auth_state import AuthState, LOGIN_ROUTE, REGISTER_ROUTE
-from .user import User
+from .google_token import get_google_token_client
+from .google_verifier import get_google_verifier
+from .hash_pool import HashPoolBusy
+from .rate_limit import client_ip, rate_limiter
+from .user import User, normalize_email
 
 GOOGLE_CLIENT_ID = os.environ["GOOGLE_CLIENT_ID"]
 GOOGLE_CLIENT_SECRET = os.environ["GOOGLE_CLIENT_SECRET"]
 
+SERVER_BUSY_MESSAGE = "The server is busy, please try again in a moment."
+TOO_MANY_ATTEMPTS_MESSAGE = "Too many attempts, please wait a minute and try again."
+
+# How long the "Registration successful!" message shows before the browser moves
+# to the login page. The wait happens client side, so the handler (and the
+# client's state lock) is released immediately.
+REGISTRATION_REDIRECT_DELAY_MS = 500
+
 class LoginRegState(AuthState):
     # State handler for registration and login pages.
 
     reg_success: bool = False
     error_message: str = ""
 
+    def _client_ip(self) -> str | None:
+        """The client address for rate limiting; see `rate_limit.client_ip`."""
+        return client_ip(
+            self.router.session.client_ip,
+            self.router.headers.raw_headers.get("x-forwarded-for"),
+        )
+
     # Handle email registration form submission and redirect to login page after registration.
+    @metrics.instrument("handle_registration")
     async def handle_registration(
         self, form_data
     ) -> AsyncGenerator[rx.event.EventSpec | list[rx.event.EventSpec] | None, None]:
@@ -34,123 +49,141 @@ class LoginRegState(AuthState):
         Args:
             form_data: A dict of form fields and values.
         """
-        with rx.session() as session:
-            username = form_data["username"]
-            email = form_data["email"]
-            if not username:
-                self.error_message = "Username cannot be empty"
-                yield rx.set_focus("username")
-                return
-            existing_user = session.exec(
-                select(User).where(User.email == email)
-            ).one_or_none()
-            if existing_user is not None:
-                self.error_message = (
-                    f"Email {email} is already registered. Try a different name"
-                )
-                yield [rx.set_value("email", ""), rx.set_focus("email")]
-                return
-            password = form_data["password"]
-            if not password:
-                self.error_message = "Password cannot be empty"
-                yield rx.set_focus("password")
-                return
-            if password != form_data["confirm_password"]:
-                self.error_message = "Passwords do not match"
-                yield [
-                    rx.set_value("confirm_password", ""),
-                    rx.set_focus("confirm_password"),
-                ]
-                return
-            # Create the new user and add it to the database.
-            new_user = User()  # type: ignore
-            new_user.username = username
-            new_user.email = email
-            new_user.password_hash = User.hash_password(password)
-            new_user.enabled = True
-            session.add(new_user)
-            session.commit()
-        # Set success and redirect to login page after a brief delay.
+        # Validate the form first: a bad submission costs no DB, limiter or hash work.
+        username = form_data["username"]
+        email = form_data["email"].strip()
+        email_normalized = normalize_email(email)
+        if not username:
+            metrics.record_outcome("handle_registration", "invalid")
+            self.error_message = "Username cannot be empty"
+            yield rx.set_focus("username")
+            return
+        if not email:
+            metrics.record_outcome("handle_registration", "invalid")
+            self.error_message = "Email cannot be empty"
+            yield rx.set_focus("email")
+            return
+        password = form_data["password"]
+        if not password:
+            metrics.record_outcome("handle_registration", "invalid")
+            self.error_message = "Password cannot be empty"
+            yield rx.set_focus("password")
+            return
+        if password != form_data["confirm_password"]:
+            metrics.record_outcome("handle_registration", "invalid")
+            self.error_message = "Passwords do not match"
+            yield [
+                rx.set_value("confirm_password", ""),
+                rx.set_focus("confirm_password"),
+            ]
+            return
+        if not await rate_limiter.allow("register", self._client_ip(), email_normalized):
+            metrics.record_outcome("handle_registration", "rate_limited")
+            self.error_message = TOO_MANY_ATTEMPTS_MESSAGE
+            return
+        # Create the new user and add it to the database. The unique index on
+        # email rejects an address that is already registered.
+        new_user = User()  # type: ignore
+        new_user.username = username
+        new_user.email = email
+        new_user.email_normalized = email_normalized
+        try:
+            new_user.password_hash = await User.hash_password_async(password)
+        except HashPoolBusy:
+            metrics.record_outcome("handle_registration", "busy")
+            self.error_message = SERVER_BUSY_MESSAGE
+            return
+        new_user.enabled = True
+        try:
+            await auth_db.create_user(new_user)
+        except auth_db.EmailAlreadyRegistered:
+            metrics.record_outcome("handle_registration", "already_registered")
+            self.error_message = (
+                f"Email {email} is already registered. Try a different name"
+            )
+            yield [rx.set_value("email", ""), rx.set_focus("email")]
+            return
+        # Set success and let the browser redirect to the login page after a brief delay.
+        metrics.record_outcome("handle_registration", "success")
         self.error_message = ""
         self.reg_success = True
-        yield
-        await asyncio.sleep(0.5)
-        yield [rx.redirect(LOGIN_ROUTE), LoginRegState.set_reg_success(False)]
+        yield rx.call_script(
+            f"setTimeout(() => window.next ? window.next.router.push('{LOGIN_ROUTE}')"
+            f" : window.location.assign('{LOGIN_ROUTE}'), {REGISTRATION_REDIRECT_DELAY_MS})"
+        )
+
+    def reset_registration(self) -> None:
+        """Clear the previous outcome when the registration page loads."""
+        self.reg_success = False
+        self.error_message = ""
 
     # Success callback after a Google login. Exchanges code for Oauth tokens and fetches user info.
-    def on_google_auth(self, code: dict):
+    @metrics.instrument("on_google_auth")
+    async def on_google_auth(self, code: dict):
         try:
-            google = OAuth2Session(GOOGLE_CLIENT_ID, redirect_uri=self.router.page.host)
-            tokens = google.fetch_token(
-                code=code['code'], 
-                token_url="https://www.googleapis.com/oauth2/v4/token", 
-                client_secret=GOOGLE_CLIENT_SECRET,
-            )
+            tokens = await get_google_token_client(
+                GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET
+            ).exchange_code(code['code'], redirect_uri=self.router.page.host)
             # Need to save tokens in the User record
-            # Now get the user info
-            google_user_info = verify_oauth2_token(
-                tokens['id_token'],
-                gauth_requests.Request(),
-                GOOGLE_CLIENT_ID,
+            # Now get the user info. Usually the certs are cached, but a refresh
+            # is a blocking fetch, so keep it off the event loop.
+            google_user_info = await asyncio.to_thread(
+                get_google_verifier(GOOGLE_CLIENT_ID).verify, tokens['id_token']
             )
-            # Link to account with existing email, or create a new User
-            with rx.session() as session:
-                user = session.exec(select(User).where(User.google_sub == google_user_info["sub"])).first()
-                if user is None:
-                    # No existing Google user, look for email match
-                    user = session.exec(select(User).where(User.email == google_user_info["email"])).first()
-                    if user:
-                        user.google_token = json.dumps(google_user_info)
-                        user.google_sub = google_user_info["sub"]
-                        session.add(user)
-                        session.commit()
-                        session.refresh(user)
-                if user is None:
-                    # No existing user, create a new one
-                    user = User(
-                        username=google_user_info["name"],
-                        email=google_user_info["email"],
-                        google_sub=google_user_info["sub"],
-                        google_token=json.dumps(google_user_info),
-                    )
-                    session.add(user)
-                    session.commit()
-                    session.refresh(user)
-                if user and user.id:
-                    self._login(user.id, user.username)
-                self.error_message = ""
-                return LoginRegState.redir()       # type: ignore             
+            # Find the Google user, link to account with existing email, or create a new User
+            user = await auth_db.resolve_google_user(google_user_info)
+            if user and user.id:
+                await self._login(user.id, user.username, user.email)
+            metrics.record_outcome("on_google_auth", "success")
+            self.error_message = ""
+            return LoginRegState.redir()       # type: ignore             
         except:
             traceback.print_exc()
+            metrics.record_outcome("on_google_auth", "failure")
             self.error_message = "There was a problem logging in, please try again."
 
-    def on_submit_email_login(self, form_data) -> rx.event.EventSpec:
+    @metrics.instrument("on_submit_email_login")
+    async def on_submit_email_login(self, form_data) -> rx.event.EventSpec:
         """Handle login form on_submit.
 
         Args:
             form_data: A dict of form fields and values.
         """
         self.error_message = ""
-        email = form_data["email"]
+        email_normalized = normalize_email(form_data["email"])
         password = form_data["password"]
-        with rx.session() as session:
-            user = session.exec(
-                select(User).where(User.email == email)
-            ).one_or_none()
+        if not await rate_limiter.allow("login", self._client_ip(), email_normalized):
+            metrics.record_outcome("on_submit_email_login", "rate_limited")
+            self.error_message = TOO_MANY_ATTEMPTS_MESSAGE
+            return rx.set_value("password", "")
+        user = await auth_db.get_user_by_email(email_normalized)
         if user is not None and not user.enabled:
+            metrics.record_outcome("on_submit_email_login", "disabled")
             self.error_message = "This account is disabled."
             return rx.set_value("password", "")
-        if user is None or not user.verify(password):
+        try:
+            new_hash = None
+            if user is None:
+                # Unknown email: burn a dummy bcrypt round so the response takes
+                # as long as a wrong password would.
+                verified = await User.dummy_verify_async()
+            else:
+                verified, new_hash = await user.verify_and_update_async(password)
+        except HashPoolBusy:
+            metrics.record_outcome("on_submit_email_login", "busy")
+            self.error_message = SERVER_BUSY_MESSAGE
+            return rx.set_value("password", "")
+        if user is None or not verified:
+            metrics.record_outcome("on_submit_email_login", "failure")
             self.error_message = "There was a problem logging in, please try again."
             return rx.set_value("password", "")
-        if (
-            user is not None
-            and user.id is not None
-            and user.enabled
-            and user.verify(password)
-        ):
+        if new_hash is not None:
+            # The stored hash predates the current password profile; migrate it.
+            await auth_db.update_password_hash(user.id, new_hash)
+        if user.id is not None:
             # mark the user as logged in
-            self._login(user.id, user.username)
+            await self._login(user.id, user.username, user.email)
+        metrics.record_outcome("on_submit_email_login", "success")
         self.error_message = ""
         return LoginRegState.redir()  # type: ignore
 
@@ -0,0 +1,241 @@
+"""
+Prometheus-style metrics for the auth pipeline, served at /metrics when
+AUTH_METRICS=1.
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+
+AUTH_METRICS_ENABLED = os.environ.get("AUTH_METRICS", "0") == "1"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = contextlib.nullcontext()
+
+# The handler currently running in this task, used to label phase timings.
+_current_handler: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "auth_metrics_handler", default=""
+)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            for labels, value in self._values.items():
+                yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> (per-bucket counts, sum, count)
+        self._values: dict[tuple[str, ...], tuple[list[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            counts, total, count = self._values.get(labels) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[labels] = (counts, total + value, count + 1)
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            for labels, (counts, total, count) in self._values.items():
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                    yield f"{self.name}_bucket{le} {bucket_count}"
+                inf = _format_labels(self.labelnames, labels, 'le="+Inf"')
+                yield f"{self.name}_bucket{inf} {count}"
+                yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}"
+                yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+handler_seconds = Histogram(
+    "auth_handler_seconds", "Latency of auth event handlers.", ("handler",)
+)
+phase_seconds = Histogram(
+    "auth_phase_seconds", "Time spent in DB, hashing and Google calls.", ("handler", "phase")
+)
+outcomes = Counter(
+    "auth_outcomes_total", "Auth handler results by outcome.", ("handler", "outcome")
+)
+
+
+@contextlib.contextmanager
+def _track(handler: str) -> Iterator[None]:
+    previous = _current_handler.get()
+    _current_handler.set(handler)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        handler_seconds.observe(time.perf_counter() - start, handler)
+        _current_handler.set(previous)
+
+
+@contextlib.contextmanager
+def _timer(phase_name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_seconds.observe(time.perf_counter() - start, _current_handler.get(), phase_name)
+
+
+def track(handler: str) -> contextlib.AbstractContextManager:
+    """Time a block as the named handler; phases inside it are labelled with it."""
+    return _track(handler) if AUTH_METRICS_ENABLED else _NOOP
+
+
+def timer(phase_name: str) -> contextlib.AbstractContextManager:
+    """Time a block as a phase of the current handler."""
+    return _timer(phase_name) if AUTH_METRICS_ENABLED else _NOOP
+
+
+def _wrap(fn: Callable, cm: Callable[[], contextlib.AbstractContextManager]) -> Callable:
+    """Wrap fn in cm, keeping fn's signature.
+
+    Reflex checks event handler arity with inspect.getfullargspec, which ignores
+    __wrapped__ but honours __signature__.
+    """
+    if inspect.isasyncgenfunction(fn):
+
+        @functools.wraps(fn)
+        async def asyncgen_wrapper(*args, **kwargs):
+            with cm():
+                async for item in fn(*args, **kwargs):
+                    yield item
+
+        asyncgen_wrapper.__signature__ = inspect.signature(fn)  # type: ignore
+        return asyncgen_wrapper
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with cm():
+                return await fn(*args, **kwargs)
+
+        async_wrapper.__signature__ = inspect.signature(fn)  # type: ignore
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with cm():
+            return fn(*args, **kwargs)
+
+    wrapper.__signature__ = inspect.signature(fn)  # type: ignore
+    return wrapper
+
+
+def instrument(handler: str) -> Callable[[Callable], Callable]:
+    """Decorator form of `track` for event handlers (sync, async or async generator)."""
+
+    def decorator(fn: Callable) -> Callable:
+        if not AUTH_METRICS_ENABLED:
+            return fn
+        return _wrap(fn, lambda: _track(handler))
+
+    return decorator
+
+
+def phase(phase_name: str) -> Callable[[Callable], Callable]:
+    """Decorator form of `timer`."""
+
+    def decorator(fn: Callable) -> Callable:
+        if not AUTH_METRICS_ENABLED:
+            return fn
+        return _wrap(fn, lambda: _timer(phase_name))
+
+    return decorator
+
+
+def record_outcome(handler: str, outcome: str) -> None:
+    if AUTH_METRICS_ENABLED:
+        outcomes.inc(handler, outcome)
+
+
+def _sample(name: str, kind: str, help: str, value: float, labels: str = "") -> Iterator[str]:
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {kind}"
+    yield f"{name}{labels} {value}"
+
+
+async def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    # Imported here because these modules import this one.
+    from . import auth_db, signed_token
+    from .hash_pool import hash_pool
+    from .rate_limit import rate_limiter
+    from .session_cache import session_cache
+
+    lines: list[str] = []
+    for metric in (handler_seconds, phase_seconds, outcomes):
+        lines.extend(metric.collect())
+    cache = session_cache.stats()
+    lines.extend(_sample("auth_session_cache_hits_total", "counter", "Session cache hits.", cache["hits"]))
+    lines.extend(_sample("auth_session_cache_misses_total", "counter", "Session cache misses.", cache["misses"]))
+    lines.extend(_sample("auth_session_cache_size", "gauge", "Cached auth tokens.", cache["size"]))
+    limiter = rate_limiter.snapshot()
+    lines.extend(_sample("auth_rate_limit_allowed_total", "counter", "Attempts allowed.", limiter["allowed"]))
+    lines.append("# HELP auth_rate_limit_rejected_total Attempts rejected, by limit.")
+    lines.append("# TYPE auth_rate_limit_rejected_total counter")
+    for scope, count in limiter["rejected"].items():
+        lines.append(f'auth_rate_limit_rejected_total{{scope="{scope}"}} {count}')
+    lines.extend(
+        _sample("auth_hash_pool_queue_depth", "gauge", "Callers waiting for the hash pool.", hash_pool.queue_depth)
+    )
+    if not signed_token.STATELESS:
+        lines.extend(
+            _sample(
+                "auth_active_sessions",
+                "gauge",
+                "Unexpired AuthSession rows.",
+                await auth_db.count_active_sessions(),
+            )
+        )
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint():
+    """FastAPI route serving `render()`; mounted at /metrics when AUTH_METRICS=1."""
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(await render(), media_type="text/plain; version=0.0.4")
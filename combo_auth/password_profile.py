@@ -0,0 +1,66 @@
+"""
+Password hashing schemes and costs, read from AUTH_PASSWORD_SCHEMES and the
+AUTH_BCRYPT_*/AUTH_ARGON2_*/AUTH_SCRYPT_* variables.
+"""
+import dataclasses
+import os
+
+from passlib.context import CryptContext
+
+
+def _env_int(name: str) -> int | None:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+@dataclasses.dataclass(frozen=True)
+class PasswordProfile:
+    """Scheme list and cost settings for a CryptContext."""
+
+    schemes: tuple[str, ...] = ("bcrypt",)
+    bcrypt_rounds: int | None = None
+    argon2_time_cost: int | None = None
+    argon2_memory_cost: int | None = None
+    argon2_parallelism: int | None = None
+    scrypt_rounds: int | None = None
+
+    @classmethod
+    def from_env(cls) -> "PasswordProfile":
+        schemes = os.environ.get("AUTH_PASSWORD_SCHEMES", "bcrypt")
+        return cls(
+            schemes=tuple(s.strip() for s in schemes.split(",") if s.strip()),
+            bcrypt_rounds=_env_int("AUTH_BCRYPT_ROUNDS"),
+            argon2_time_cost=_env_int("AUTH_ARGON2_TIME_COST"),
+            argon2_memory_cost=_env_int("AUTH_ARGON2_MEMORY_COST"),
+            argon2_parallelism=_env_int("AUTH_ARGON2_PARALLELISM"),
+            scrypt_rounds=_env_int("AUTH_SCRYPT_ROUNDS"),
+        )
+
+    def crypt_context(self) -> CryptContext:
+        """Build a CryptContext for this profile.
+
+        Each configured rounds cost is also used as the scheme's minimum and
+        maximum, so hashes made with any other cost report `needs_update`
+        (argon2 compares memory_cost itself).
+        """
+        settings: dict[str, int] = {}
+        costs = {
+            "bcrypt__rounds": self.bcrypt_rounds,
+            "argon2__time_cost": self.argon2_time_cost,
+            "argon2__memory_cost": self.argon2_memory_cost,
+            "argon2__parallelism": self.argon2_parallelism,
+            "scrypt__rounds": self.scrypt_rounds,
+        }
+        for key, value in costs.items():
+            if value is not None:
+                settings[key] = value
+        rounds = {
+            "bcrypt": self.bcrypt_rounds,
+            "argon2": self.argon2_time_cost,
+            "scrypt": self.scrypt_rounds,
+        }
+        for scheme, value in rounds.items():
+            if value is not None:
+                settings[f"{scheme}__min_rounds"] = value
+                settings[f"{scheme}__max_rounds"] = value
+        return CryptContext(schemes=list(self.schemes), deprecated="auto", **settings)
@@ -0,0 +1,27 @@
+import reflex as rx
+
+from .user import ANON_SENITINEL
+
+
+class Principal(rx.Base):
+    """The authenticated user as held in state and the session cache.
+
+    Only the fields pages need, so per-client state and websocket deltas stay
+    small and the password hash and Google token never reach client state. Load
+    the full User row on demand with `auth_db.get_user`.
+    """
+
+    id: str | None = None
+    username: str = ANON_SENITINEL
+    email: str = ""
+    enabled: bool = True
+
+    class Config:
+        frozen = True
+
+    def is_anonymous(self) -> bool:
+        """Whether this is the anonymous principal."""
+        return self.username == ANON_SENITINEL
+
+
+ANONYMOUS = Principal()
@@ -0,0 +1,261 @@
+"""
+Bulk user provisioning from CSV or JSONL.
+
+    python -m combo_auth.provisioning users.csv
+"""
+import argparse
+import concurrent.futures
+import csv
+import dataclasses
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from sqlalchemy import Engine, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from .user import User, normalize_email, pwd_context, uuidcol
+
+DEFAULT_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class RowError:
+    line: int
+    email: str
+    reason: str
+
+
+@dataclasses.dataclass
+class ProvisionReport:
+    read: int = 0
+    created: int = 0
+    existing: int = 0
+    errors: list[RowError] = dataclasses.field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def read_rows(
+    path: str, format: str | None = None
+) -> Iterator[tuple[int, dict[str, Any] | RowError]]:
+    """Stream (line number, row) pairs from a CSV (with a header) or JSONL file.
+
+    A JSONL line that isn't valid JSON is yielded as a RowError instead of a row,
+    so one bad line doesn't stop the stream.
+
+    Args:
+        path: The file to read.
+        format: "csv" or "jsonl"; guessed from the extension if None.
+    """
+    if format is None:
+        format = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+    with open(path, newline="", encoding="utf-8") as f:
+        if format == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        elif format == "jsonl":
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except json.JSONDecodeError as e:
+                    yield line, RowError(line, "", f"invalid JSON: {e.msg}")
+        else:
+            raise ValueError(f"Unknown format: {format}")
+
+
+def _hash_password(secret: str) -> str:
+    return pwd_context.hash(secret)
+
+
+def _enabled(value: Any) -> bool:
+    """Parse the optional "enabled" column; missing or blank means enabled."""
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() not in ("0", "false", "no")
+    return bool(value)
+
+
+@dataclasses.dataclass
+class _Candidate:
+    line: int
+    username: str
+    email: str
+    email_normalized: str
+    password: str
+    enabled: bool
+
+
+def _parse_row(line: int, row: Any) -> _Candidate | RowError:
+    """Check a row's shape and field types; never raises."""
+    if isinstance(row, RowError):
+        return row
+    if not isinstance(row, dict):
+        return RowError(line, "", "row is not an object")
+    username, email = row.get("username"), row.get("email")
+    password, enabled = row.get("password"), row.get("enabled")
+    email_text = email if isinstance(email, str) else ""
+    for name, value in (("username", username), ("email", email), ("password", password)):
+        if value is not None and not isinstance(value, str):
+            return RowError(line, email_text, f"{name} must be a string")
+    if enabled is not None and not isinstance(enabled, (str, bool, int)):
+        return RowError(line, email_text, "enabled must be a boolean")
+    username, email = (username or "").strip(), (email or "").strip()
+    if not username or not email:
+        return RowError(line, email, "username and email are required")
+    return _Candidate(
+        line=line,
+        username=username,
+        email=email,
+        email_normalized=normalize_email(email),
+        password=password or "",
+        enabled=_enabled(enabled),
+    )
+
+
+def provision_users(
+    rows: Iterable[tuple[int, dict[str, Any] | RowError]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int | None = None,
+    engine: Engine | None = None,
+) -> ProvisionReport:
+    """Create User rows in batches; see the module docstring.
+
+    Args:
+        rows: (line number, row) pairs, e.g. from `read_rows`.
+        batch_size: Rows per dedupe query, hash fan-out and INSERT transaction.
+        workers: Hashing processes; defaults to the number of cores.
+        engine: The database engine; defaults to `auth_db.get_sync_engine()`.
+
+    Returns:
+        Counts, elapsed time and the per-row errors.
+    """
+    if engine is None:
+        from .auth_db import get_sync_engine
+
+        engine = get_sync_engine()
+    report = ProvisionReport()
+    seen: set[str] = set()
+    start = time.perf_counter()
+    rows = iter(rows)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        while chunk := list(itertools.islice(rows, batch_size)):
+            report.read += len(chunk)
+            _provision_chunk(chunk, engine, pool, seen, report)
+            logger.info(
+                "Provisioned %d/%d rows (%.0f rows/s)",
+                report.created,
+                report.read,
+                report.read / (time.perf_counter() - start),
+            )
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def _provision_chunk(
+    chunk: list[tuple[int, dict[str, Any] | RowError]],
+    engine: Engine,
+    pool: concurrent.futures.Executor,
+    seen: set[str],
+    report: ProvisionReport,
+) -> None:
+    valid: list[_Candidate] = []
+    for line, row in chunk:
+        candidate = _parse_row(line, row)
+        if isinstance(candidate, RowError):
+            report.errors.append(candidate)
+        elif candidate.email_normalized in seen:
+            report.errors.append(RowError(line, candidate.email, "duplicate email in input"))
+        else:
+            seen.add(candidate.email_normalized)
+            valid.append(candidate)
+    if not valid:
+        return
+
+    with engine.connect() as connection:
+        existing = set(
+            connection.execute(
+                select(User.email_normalized).where(
+                    User.email_normalized.in_([c.email_normalized for c in valid])
+                )
+            ).scalars()
+        )
+    report.existing += len(existing)
+    valid = [c for c in valid if c.email_normalized not in existing]
+
+    to_hash = [c.password for c in valid if c.password]
+    hashes = iter(pool.map(_hash_password, to_hash, chunksize=max(1, len(to_hash) // 64)))
+    records = []
+    for c in valid:
+        records.append(
+            (
+                c.line,
+                {
+                    "id": uuidcol(),
+                    "username": c.username,
+                    "email": c.email,
+                    "email_normalized": c.email_normalized,
+                    "password_hash": next(hashes) if c.password else None,
+                    "enabled": c.enabled,
+                    "google_sub": None,
+                },
+            )
+        )
+    if not records:
+        return
+
+    table = User.__table__
+    try:
+        with engine.begin() as connection:
+            connection.execute(insert(table), [values for _, values in records])
+        report.created += len(records)
+        return
+    except IntegrityError:
+        logger.info("Batch insert conflicted; retrying %d rows one at a time", len(records))
+    for line, values in records:
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(table), values)
+            report.created += 1
+        except IntegrityError as e:
+            report.errors.append(RowError(line, values["email"], f"insert failed: {e.orig}"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-create users from CSV or JSONL.")
+    parser.add_argument("path", help="CSV (with header) or JSONL file")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    report = provision_users(
+        read_rows(args.path, args.format), batch_size=args.batch_size, workers=args.workers
+    )
+    for error in report.errors:
+        print(f"line {error.line}: {error.email or '-'}: {error.reason}", file=sys.stderr)
+    print(
+        f"read {report.read}, created {report.created}, already registered "
+        f"{report.existing}, errors {len(report.errors)} in {report.seconds:.1f}s "
+        f"({report.rows_per_second:.0f} rows/s)"
+    )
+    sys.exit(1 if report.errors else 0)
+
+
+if __name__ == "__main__":
+    main()
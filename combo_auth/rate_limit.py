@@ -0,0 +1,189 @@
+"""
+Global, per-IP and per-email rate limits for login and registration attempts.
+"""
+import math
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+AUTH_RATE_LIMIT_BACKEND = os.environ.get("AUTH_RATE_LIMIT_BACKEND", "memory")
+AUTH_RATE_LIMIT_REDIS_URL = os.environ.get("AUTH_RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+AUTH_RATE_LIMIT_GLOBAL = os.environ.get("AUTH_RATE_LIMIT_GLOBAL", "100/1")
+AUTH_RATE_LIMIT_PER_IP = os.environ.get("AUTH_RATE_LIMIT_PER_IP", "60/60")
+AUTH_RATE_LIMIT_PER_EMAIL = os.environ.get("AUTH_RATE_LIMIT_PER_EMAIL", "5/60")
+AUTH_RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get("AUTH_RATE_LIMIT_TRUSTED_PROXIES", "0"))
+
+MEMORY_BACKEND_MAX_KEYS = 100_000
+
+
+def client_ip(
+    peer_ip: str | None,
+    forwarded_for: str | None,
+    trusted_proxies: int = AUTH_RATE_LIMIT_TRUSTED_PROXIES,
+) -> str | None:
+    """The client address to apply the per-IP limit to.
+
+    Each trusted proxy appends the address it received the request from to
+    X-Forwarded-For, so the client is the trusted_proxies-th entry from the
+    right; entries further left were supplied by the client and are ignored.
+
+    Args:
+        peer_ip: The socket peer address.
+        forwarded_for: The X-Forwarded-For header, if any.
+        trusted_proxies: Reverse proxies in front of the app; 0 uses peer_ip.
+            Any client can send X-Forwarded-For, so only set it when every
+            request arrives through those proxies.
+    """
+    if trusted_proxies <= 0 or not forwarded_for:
+        return peer_ip
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    if not hops:
+        return peer_ip
+    return hops[-min(trusted_proxies, len(hops))]
+
+
+class RateLimit:
+    """Allow `limit` attempts per `window_seconds`."""
+
+    def __init__(self, limit: int, window_seconds: float):
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Parse "N/S", e.g. "20/60" for 20 attempts per minute."""
+        limit, _, window = spec.partition("/")
+        return cls(int(limit), float(window or 1))
+
+    def __repr__(self):
+        return f"RateLimit({self.limit}/{self.window_seconds:g}s)"
+
+
+class MemoryBackend:
+    """Per-process token buckets, evicting the least recently used keys."""
+
+    def __init__(self, max_keys: int = MEMORY_BACKEND_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, rate: RateLimit) -> bool:
+        """Take one token from key's bucket; False if it is empty."""
+        now = time.monotonic()
+        refill_per_second = rate.limit / rate.window_seconds
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(rate.limit), now))
+            tokens = min(float(rate.limit), tokens + (now - updated) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+    def tracked_keys(self) -> int | None:
+        return len(self._buckets)
+
+
+class RedisBackend:
+    """Sliding-window log per key in a Redis sorted set, shared across workers.
+
+    Args:
+        client: A redis.asyncio.Redis (or compatible) client.
+        prefix: Prepended to every key.
+    """
+
+    def __init__(self, client: Any, prefix: str = "auth_rl:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, rate: RateLimit) -> bool:
+        now = time.time()
+        key = self.prefix + key
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zremrangebyscore(key, 0, now - rate.window_seconds)
+        pipe.zadd(key, {f"{now}:{secrets.token_hex(4)}": now})
+        pipe.zcard(key)
+        pipe.expire(key, math.ceil(rate.window_seconds))
+        _, _, count, _ = await pipe.execute()
+        return count <= rate.limit
+
+    def tracked_keys(self) -> int | None:
+        return None
+
+
+class RateLimiter:
+    """Checks attempts against global, per-IP and per-email limits."""
+
+    def __init__(
+        self,
+        backend: MemoryBackend | RedisBackend,
+        global_limit: RateLimit,
+        per_ip: RateLimit,
+        per_email: RateLimit,
+    ):
+        self.backend = backend
+        self.global_limit = global_limit
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self.allowed = 0
+        self.rejected: dict[str, int] = {"global": 0, "ip": 0, "email": 0}
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        if AUTH_RATE_LIMIT_BACKEND == "redis":
+            import redis.asyncio
+
+            backend = RedisBackend(redis.asyncio.Redis.from_url(AUTH_RATE_LIMIT_REDIS_URL))
+        else:
+            backend = MemoryBackend()
+        return cls(
+            backend,
+            global_limit=RateLimit.parse(AUTH_RATE_LIMIT_GLOBAL),
+            per_ip=RateLimit.parse(AUTH_RATE_LIMIT_PER_IP),
+            per_email=RateLimit.parse(AUTH_RATE_LIMIT_PER_EMAIL),
+        )
+
+    async def allow(self, action: str, ip: str | None, email: str | None) -> bool:
+        """Record an attempt at action and return whether it may proceed.
+
+        Args:
+            action: What is being attempted, e.g. "login"; each has its own limits.
+            ip: The client IP, if known.
+            email: The submitted email, if any.
+        """
+        # Most specific first, so one abusive client is turned away before it
+        # uses up the global allowance everyone shares.
+        checks = []
+        if email:
+            checks.append(("email", f"{action}:email:{email.strip().lower()}", self.per_email))
+        if ip:
+            checks.append(("ip", f"{action}:ip:{ip}", self.per_ip))
+        checks.append(("global", f"{action}:global", self.global_limit))
+        for scope, key, rate in checks:
+            if not await self.backend.hit(key, rate):
+                self.rejected[scope] += 1
+                return False
+        self.allowed += 1
+        return True
+
+    def snapshot(self) -> dict:
+        """Current limiter state, for monitoring."""
+        return {
+            "backend": type(self.backend).__name__,
+            "limits": {
+                "global": repr(self.global_limit),
+                "ip": repr(self.per_ip),
+                "email": repr(self.per_email),
+            },
+            "allowed": self.allowed,
+            "rejected": dict(self.rejected),
+            "tracked_keys": self.backend.tracked_keys(),
+        }
+
+
+rate_limiter = RateLimiter.from_env()
@@ -7,7 +7,7 @@ from sqlmodel import select
 from .login_page import LoginRegState, REGISTER_ROUTE
 
 
-@rx.page(route=REGISTER_ROUTE)
+@rx.page(route=REGISTER_ROUTE, on_load=LoginRegState.reset_registration)
 def registration_page() -> rx.Component:
     """Render the registration page.
 
@@ -0,0 +1,93 @@
+"""
+Process-local cache of auth_token -> Principal lookups for
+`AuthState.authenticated_user`, expiring with the session or the cache TTL.
+"""
+import datetime
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .principal import Principal
+
+SESSION_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_SESSION_CACHE_MAX_ENTRIES", "10000"))
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_SESSION_CACHE_TTL", "60"))
+
+
+class SessionCache:
+    """A bounded LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Principal | None:
+        """Return the cached Principal for token, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return user
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user: Principal, expiration: datetime.datetime) -> None:
+        """Cache user for token until min(expiration, now + ttl)."""
+        if self.max_entries <= 0:
+            return
+        if expiration.tzinfo is None:
+            # SQLite hands back naive datetimes; they are stored as UTC.
+            expiration = expiration.replace(tzinfo=datetime.timezone.utc)
+        remaining = (expiration - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+        lifetime = min(remaining, self.ttl_seconds)
+        if lifetime <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (time.monotonic() + lifetime, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every cached token belonging to user_id.
+
+        Returns:
+            The number of entries dropped.
+        """
+        with self._lock:
+            tokens = [t for t, (_, user) in self._entries.items() if user.id == user_id]
+            for token in tokens:
+                del self._entries[token]
+            return len(tokens)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+session_cache = SessionCache(SESSION_CACHE_MAX_ENTRIES, SESSION_CACHE_TTL_SECONDS)
@@ -0,0 +1,61 @@
+"""
+Background task that deletes expired AuthSession rows in batches.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import time
+
+from . import auth_db
+
+REAPER_INTERVAL_SECONDS = float(os.environ.get("AUTH_SESSION_REAPER_INTERVAL", "300"))
+REAPER_BATCH_SIZE = int(os.environ.get("AUTH_SESSION_REAPER_BATCH_SIZE", "1000"))
+
+logger = logging.getLogger(__name__)
+
+# Result of the most recent sweep, for monitoring.
+last_sweep = {"removed": 0, "batches": 0, "seconds": 0.0, "finished_at": None}
+
+
+async def reap_expired_sessions(batch_size: int = REAPER_BATCH_SIZE) -> int:
+    """Delete all currently expired AuthSessions, batch_size rows at a time.
+
+    Returns:
+        The number of rows removed.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = time.perf_counter()
+    removed = batches = 0
+    while True:
+        deleted = await auth_db.delete_expired_auth_sessions(now, batch_size)
+        removed += deleted
+        batches += 1
+        if deleted < batch_size:
+            break
+        # Let other requests at the database between batches.
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    last_sweep.update(
+        removed=removed,
+        batches=batches,
+        seconds=elapsed,
+        finished_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+    logger.info(
+        "Reaped %d expired auth sessions in %d batches (%.3fs)", removed, batches, elapsed
+    )
+    return removed
+
+
+async def run_session_reaper() -> None:
+    """Sweep expired AuthSessions every REAPER_INTERVAL_SECONDS, forever.
+
+    Registered with app.register_lifespan_task.
+    """
+    while True:
+        try:
+            await reap_expired_sessions()
+        except Exception:
+            logger.exception("Expired auth session sweep failed")
+        await asyncio.sleep(REAPER_INTERVAL_SECONDS)
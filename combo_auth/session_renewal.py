@@ -0,0 +1,112 @@
+"""
+Sliding expiration for AuthSessions, with renewal writes batched in the background.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import threading
+
+from . import auth_db
+
+RENEW_AFTER_FRACTION = float(os.environ.get("AUTH_SESSION_RENEW_AFTER", "0.5"))
+RENEW_INTERVAL_SECONDS = float(os.environ.get("AUTH_SESSION_RENEW_INTERVAL", "60"))
+
+logger = logging.getLogger(__name__)
+
+
+class SessionRenewals:
+    """session_id -> new expiration, for sessions due a renewal write.
+
+    Args:
+        renew_after: Fraction of the lifetime that must have elapsed before a
+            session is extended.
+    """
+
+    def __init__(self, renew_after: float = RENEW_AFTER_FRACTION):
+        self.renew_after = renew_after
+        self._dirty: dict[str, datetime.datetime] = {}
+        self._lock = threading.Lock()
+
+    def maybe_renew(
+        self,
+        session_id: str,
+        expiration: datetime.datetime,
+        lifetime: datetime.timedelta,
+    ) -> datetime.datetime | None:
+        """Queue a renewal if enough of the session's lifetime has passed.
+
+        Args:
+            session_id: The auth token.
+            expiration: The session's current expiration.
+            lifetime: The full session lifetime to extend to.
+
+        Returns:
+            The new expiration if a renewal was queued, else None.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=datetime.timezone.utc)
+        if expiration - now > lifetime * (1 - self.renew_after):
+            return None
+        new_expiration = now + lifetime
+        with self._lock:
+            self._dirty[session_id] = new_expiration
+        return new_expiration
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._dirty.pop(session_id, None)
+
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    def _take(self) -> dict[str, datetime.datetime]:
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        return dirty
+
+    def _restore(self, dirty: dict[str, datetime.datetime]) -> None:
+        with self._lock:
+            for session_id, expiration in dirty.items():
+                self._dirty.setdefault(session_id, expiration)
+
+    async def flush(self) -> int:
+        """Write all pending renewals in one bulk UPDATE.
+
+        On failure the renewals are put back for the next flush.
+
+        Returns:
+            The number of sessions written.
+        """
+        dirty = self._take()
+        if not dirty:
+            return 0
+        try:
+            await auth_db.extend_auth_sessions(dirty)
+        except Exception:
+            self._restore(dirty)
+            raise
+        logger.debug("Renewed %d auth sessions", len(dirty))
+        return len(dirty)
+
+
+session_renewals = SessionRenewals()
+
+
+async def run_session_renewer() -> None:
+    """Flush queued renewals every RENEW_INTERVAL_SECONDS, forever.
+
+    Registered with app.register_lifespan_task. Pending renewals are flushed
+    once more on shutdown.
+    """
+    try:
+        while True:
+            await asyncio.sleep(RENEW_INTERVAL_SECONDS)
+            try:
+                await session_renewals.flush()
+            except Exception:
+                logger.exception("Auth session renewal flush failed")
+    except asyncio.CancelledError:
+        await session_renewals.flush()
+        raise
@@ -1,25 +1,31 @@
 import reflex as rx
 
-from .auth_state import AuthState, require_login
+from . import signed_token
+from .auth_state import AuthState, protected_page
 
-@rx.page(route="/settings")
-@require_login
+@protected_page("/settings")
 def settings_page() -> rx.Component:
     """Render a protected page.
 
-    The `require_login` decorator will redirect to the login page if the user is
+    The `protected_page` decorator will redirect to the login page if the user is
     not authenticated.
 
     Returns:
         A reflex component.
     """
+    links = [rx.chakra.link("Logout", href="/", on_click=AuthState.do_logout)]
+    # Stateless tokens can't be revoked across workers, so there is no "everywhere".
+    if not signed_token.STATELESS:
+        links.append(
+            rx.chakra.link("Logout everywhere", href="/", on_click=AuthState.do_logout_everywhere)
+        )
     return rx.chakra.vstack(
         rx.chakra.heading(
             "Settings Page for ", AuthState.authenticated_user.username, font_size="2em"
         ),
         rx.chakra.link("Home", href="/home"),
         rx.chakra.text("Email: " +AuthState.authenticated_user.email),
-        rx.chakra.link("Logout", href="/", on_click=AuthState.do_logout),
+        *links,
         bg="lightblue",
     )
 
@@ -0,0 +1,104 @@
+"""
+Stateless, HMAC-signed session tokens for AUTH_SESSION_MODE=stateless.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any
+
+AUTH_SESSION_MODE = os.environ.get("AUTH_SESSION_MODE", "table")
+AUTH_TOKEN_SECRET = os.environ.get("AUTH_TOKEN_SECRET", "")
+
+STATELESS = AUTH_SESSION_MODE == "stateless"
+
+if STATELESS and not AUTH_TOKEN_SECRET:
+    raise RuntimeError("AUTH_TOKEN_SECRET must be set when AUTH_SESSION_MODE=stateless")
+
+
+class SessionModeError(RuntimeError):
+    """An operation isn't available in the configured AUTH_SESSION_MODE."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _secret() -> bytes:
+    if not AUTH_TOKEN_SECRET:
+        raise RuntimeError("AUTH_TOKEN_SECRET must be set to use stateless sessions")
+    return AUTH_TOKEN_SECRET.encode("utf-8")
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_secret(), payload.encode("utf-8"), hashlib.sha256).digest())
+
+
+def issue_token(user_id: str, username: str, email: str, expires_at: float) -> str:
+    """Create a signed token for the user, valid until the expires_at timestamp."""
+    claims = {
+        "sub": user_id,
+        "name": username,
+        "email": email,
+        "iat": time.time(),
+        "exp": int(expires_at),
+        "jti": secrets.token_urlsafe(12),
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload)}"
+
+
+def read_token(token: str) -> dict[str, Any] | None:
+    """The token's claims if it is correctly signed, unexpired and not revoked.
+
+    auth_token comes from client storage, so any malformed input yields None
+    rather than an exception.
+    """
+    # compare_digest only accepts ASCII str; a valid token is always ASCII.
+    if not token.isascii():
+        return None
+    payload, _, signature = token.partition(".")
+    if not signature or not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+    if not isinstance(claims, dict) or not isinstance(claims.get("exp"), (int, float)):
+        return None
+    if claims["exp"] < time.time() or denylist.is_revoked(claims):
+        return None
+    return claims
+
+
+class TokenDenylist:
+    """Revoked token ids in this process, held until the tokens expire."""
+
+    def __init__(self):
+        self._tokens: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, claims: dict[str, Any]) -> None:
+        """Revoke a single token."""
+        with self._lock:
+            self._purge()
+            self._tokens[claims["jti"]] = claims["exp"]
+
+    def is_revoked(self, claims: dict[str, Any]) -> bool:
+        with self._lock:
+            return claims.get("jti") in self._tokens
+
+    def _purge(self) -> None:
+        now = time.time()
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp >= now}
+
+
+denylist = TokenDenylist()
@@ -1,34 +1,44 @@
-from passlib.context import CryptContext
 from uuid import uuid4 as get_uuid4
 import uuid
 from sqlmodel import Field
 
 import reflex as rx
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .hash_pool import hash_pool
+from .password_profile import PasswordProfile
+
+pwd_context = PasswordProfile.from_env().crypt_context()
 
 ANON_SENITINEL = "__anonymous__"
 
 def uuidcol():
     return str(get_uuid4())
 
+def normalize_email(email: str) -> str:
+    """The form of an email used for lookups and uniqueness (User.email_normalized).
+
+    Apply it once where an email enters the app (forms, Google claims, imports)
+    so queries compare against the indexed column rather than lower(email).
+    """
+    return email.strip().lower()
+
 class User(
     rx.Model,
     table=True,  # type: ignore
 ):
-    """A local User model with bcrypt password hashing."""
+    """A local User model with bcrypt (or configured scheme) password hashing."""
     id: str = Field(default_factory=uuidcol, primary_key=True)
 
     username: str = Field(nullable=False, index=True)
     email: str = Field(unique=True, nullable=False, index=True)
+    email_normalized: str = Field(unique=True, nullable=False, index=True)
     password_hash: str = Field(nullable=True)
     enabled: bool = True
-    google_token: str = Field(nullable=True)
-    google_sub: str = Field(nullable=True)
+    google_sub: str = Field(nullable=True, unique=True, index=True)
 
     @staticmethod
     def hash_password(secret: str) -> str:
-        """Hash the secret using bcrypt.
+        """Hash the secret using the configured password profile.
 
         Args:
             secret: The password to hash.
@@ -38,6 +48,19 @@ class User(
         """
         return pwd_context.hash(secret)
 
+    @staticmethod
+    def check_password(secret: str, password_hash: str | None) -> bool:
+        """Check secret against a stored password hash.
+
+        Args:
+            secret: The password to check.
+            password_hash: The stored hash, or None for users without a password.
+
+        Returns:
+            True if the hashed secret matches password_hash.
+        """
+        return pwd_context.verify(secret, password_hash)
+
     def verify(self, secret: str) -> bool:
         """Validate the user's password.
 
@@ -47,10 +70,62 @@ class User(
         Returns:
             True if the hashed secret matches this user's password_hash.
         """
-        return pwd_context.verify(
-            secret,
-            self.password_hash,
-        )
+        return User.check_password(secret, self.password_hash)
+
+    @staticmethod
+    def check_and_update_password(secret: str, password_hash: str | None) -> tuple[bool, str | None]:
+        """Check secret against a stored hash, rehashing it if the hash is outdated.
+
+        Args:
+            secret: The password to check.
+            password_hash: The stored hash, or None for users without a password.
+
+        Returns:
+            (matched, new_hash), where new_hash is a replacement hash under the
+            current password profile if the stored one needs updating, else None.
+        """
+        return pwd_context.verify_and_update(secret, password_hash)
+
+    @staticmethod
+    def dummy_verify() -> bool:
+        """Spend the same time as a real password check, against a dummy hash.
+
+        Used when there is no user to check so that response timing doesn't
+        reveal whether an email is registered.
+
+        Returns:
+            Always False.
+        """
+        pwd_context.dummy_verify()
+        return False
+
+    @staticmethod
+    async def hash_password_async(secret: str) -> str:
+        """Like hash_password, but runs on the hash pool instead of the event loop.
+
+        Raises:
+            HashPoolBusy: If too many hashes are already queued.
+        """
+        return await hash_pool.run(User.hash_password, secret)
+
+    async def verify_and_update_async(self, secret: str) -> tuple[bool, str | None]:
+        """Like verify, but also returns a replacement hash if this one is outdated.
+
+        Runs on the hash pool instead of the event loop.
+
+        Raises:
+            HashPoolBusy: If too many hashes are already queued.
+        """
+        return await hash_pool.run(User.check_and_update_password, secret, self.password_hash)
+
+    @staticmethod
+    async def dummy_verify_async() -> bool:
+        """Like dummy_verify, but runs on the hash pool instead of the event loop.
+
+        Raises:
+            HashPoolBusy: If too many hashes are already queued.
+        """
+        return await hash_pool.run(User.dummy_verify)
 
     def is_anonymous(self) -> bool:
         """Whether this user is an anonymous user."""
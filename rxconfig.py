@@ -1,7 +1,15 @@
 import reflex as rx
 
 class LocalauthConfig(rx.Config):
-    pass
+    # Auth database profile (see combo_auth/db_profile.py). Each field can be
+    # overridden by its upper-cased name in the environment.
+    auth_db_sqlite_journal_mode: str | None = "wal"
+    auth_db_sqlite_busy_timeout_ms: int | None = 5000
+    auth_db_sqlite_synchronous: str | None = "normal"
+    auth_db_pool_size: int = 5
+    auth_db_max_overflow: int = 10
+    auth_db_pool_pre_ping: bool = True
+    auth_db_statement_timeout_ms: int | None = 5000
 
 config = LocalauthConfig(
     app_name="combo_auth",